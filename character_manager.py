@@ -6,15 +6,32 @@ Name: Kabijah Hill
 AI Usage: Fixed structure, improved errors, cleaned validation.
 """
 
+import csv
+import heapq
+import itertools
+import json
 import os
+import shutil
+import threading
+import time
+from functools import wraps
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from custom_exceptions import (
     InvalidCharacterClassError,
     CharacterNotFoundError,
     SaveFileCorruptedError,
     InvalidSaveDataError,
-    CharacterDeadError
+    CharacterDeadError,
+    SaveFileLockedError
 )
 
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on this platform; save locking becomes a no-op
+    fcntl = None
+
 # ============================================================================
 # CHARACTER CREATION
 # ============================================================================
@@ -48,10 +65,222 @@ def create_character(name, character_class):
         "completed_quests": []
     }
 
+# ============================================================================
+# SAVE FILE LOCKING
+# ============================================================================
+
+# Seconds to wait for a save file lock before raising SaveFileLockedError
+SAVE_LOCK_TIMEOUT = 10.0
+LOCK_POLL_INTERVAL = 0.005
+
+_lock_metrics = {
+    "shared": 0,
+    "exclusive": 0,
+    "contended": 0,
+    "timeouts": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+}
+
+
+@contextmanager
+def save_file_lock(filename, exclusive=False, timeout=None):
+
+    # Advisory reader/writer lock on a "<save>.lock" sidecar file: loads take
+    # it shared, saves and deletes take it exclusive. Works across processes.
+    #
+    # The sidecar is created by the first exclusive lock and never removed:
+    # deleting it while another process waits on it would let that process
+    # and a new locker both hold "exclusive" on different files. Readers
+    # don't create it; with no sidecar no save is in progress under this
+    # scheme, and saves replace the file atomically, so a read can't be torn.
+    if fcntl is None:
+        yield
+        return
+
+    timeout = SAVE_LOCK_TIMEOUT if timeout is None else timeout
+    mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    try:
+        if exclusive:
+            fd = os.open(filename + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            fd = os.open(filename + ".lock", os.O_RDONLY)
+    except FileNotFoundError:
+        yield
+        return
+
+    try:
+        start = time.monotonic()
+        contended = False
+
+        while True:
+            try:
+                fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                contended = True
+                if time.monotonic() - start >= timeout:
+                    _lock_metrics["timeouts"] += 1
+                    raise SaveFileLockedError(f"Timed out waiting for lock on {filename}")
+                time.sleep(LOCK_POLL_INTERVAL)
+
+        waited = time.monotonic() - start
+        _lock_metrics["exclusive" if exclusive else "shared"] += 1
+        _lock_metrics["contended"] += contended
+        _lock_metrics["wait_seconds"] += waited
+        _lock_metrics["max_wait_seconds"] = max(_lock_metrics["max_wait_seconds"], waited)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def get_lock_metrics():
+
+    # Counters for this process only
+    return dict(_lock_metrics)
+
+
+def reset_lock_metrics():
+
+    for key in _lock_metrics:
+        _lock_metrics[key] = 0.0 if key.endswith("seconds") else 0
+
+# ============================================================================
+# CHARACTER LOCKS
+# ============================================================================
+
+# Character locks are striped: each character maps to one of these by id,
+# so nothing is stored on the character and no registry grows over time
+CHARACTER_LOCK_STRIPES = 256
+_character_locks = [threading.RLock() for _ in range(CHARACTER_LOCK_STRIPES)]
+
+# Updated under the guard; it is only held for a few additions
+_character_lock_metrics = {
+    "acquired": 0,
+    "contended": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+}
+_character_metrics_guard = threading.Lock()
+
+
+def _acquire_character_lock(character):
+
+    # Re-entrant lock for one character, so threads working on different
+    # characters (almost always) don't wait on each other. Take one
+    # character's lock at a time; holding two in different orders on two
+    # threads could deadlock.
+    lock = _character_locks[(id(character) >> 4) % CHARACTER_LOCK_STRIPES]
+
+    with _character_metrics_guard:
+        _character_lock_metrics["acquired"] += 1
+
+    if not lock.acquire(blocking=False):
+        start = time.monotonic()
+        lock.acquire()
+        waited = time.monotonic() - start
+
+        with _character_metrics_guard:
+            _character_lock_metrics["contended"] += 1
+            _character_lock_metrics["wait_seconds"] += waited
+            _character_lock_metrics["max_wait_seconds"] = max(
+                _character_lock_metrics["max_wait_seconds"], waited
+            )
+
+    return lock
+
+
+@contextmanager
+def character_lock(character):
+
+    lock = _acquire_character_lock(character)
+    try:
+        yield character
+    finally:
+        lock.release()
+
+
+def synchronized(func):
+
+    # Decorator: run func while holding the lock of the character passed as
+    # its first argument
+    @wraps(func)
+    def wrapper(character, *args, **kwargs):
+        lock = _acquire_character_lock(character)
+        try:
+            return func(character, *args, **kwargs)
+        finally:
+            lock.release()
+
+    return wrapper
+
+
+def get_character_lock_metrics():
+
+    with _character_metrics_guard:
+        return dict(_character_lock_metrics)
+
+
+def reset_character_lock_metrics():
+
+    with _character_metrics_guard:
+        for key in _character_lock_metrics:
+            _character_lock_metrics[key] = 0.0 if key.endswith("seconds") else 0
+
 # ============================================================================
 # SAVE CHARACTER
 # ============================================================================
 
+# Stat lines at the top of every save, in the order they are written
+SAVE_HEADER_FIELDS = [
+    "name", "class", "level", "health", "max_health",
+    "strength", "magic", "experience", "gold"
+]
+SAVE_NUMERIC_FIELDS = [
+    "level", "health", "max_health", "strength", "magic", "experience", "gold"
+]
+# Comma-separated lists written after the header
+SAVE_LIST_FIELDS = ["inventory", "active_quests", "completed_quests"]
+# Numeric fields written last, and only when the character has them
+SAVE_OPTIONAL_FIELDS = ["inventory_capacity"]
+
+
+def _stack_limits(character):
+
+    # Stack sizes above 1 for held items: from the Inventory once
+    # inventory_system has converted the list, otherwise as loaded
+    inventory = current_value(character["inventory"])
+    if callable(getattr(inventory, "stack_limits", None)):
+        return inventory.stack_limits()
+    return dict(current_value(character.get("stack_limits")) or {})
+
+
+def _format_stack_limits(limits):
+
+    return ",".join(f"{item_id}:{limit}" for item_id, limit in limits.items())
+
+
+def _parse_stack_limits(value):
+
+    limits = {}
+    for pair in value.split(",") if value else []:
+        item_id, limit = pair.rsplit(":", 1)
+        limits[item_id] = int(limit)
+    return limits
+
+
+def _equipped_slots(character):
+
+    # Occupied equipment slots, from the "equipped_<slot>" fields
+    return [key[len("equipped_"):] for key, item_id in character.items()
+            if key.startswith("equipped_") and item_id is not None]
+
+
 def save_character(character, save_directory="data/save_games"):
 
     if not os.path.exists(save_directory):
@@ -59,16 +288,55 @@ def save_character(character, save_directory="data/save_games"):
 
     filename = os.path.join(save_directory, f"{character['name']}_save.txt")
 
-    with open(filename, "w") as f:
-        for key in [
-            "name", "class", "level", "health", "max_health",
-            "strength", "magic", "experience", "gold"
-        ]:
-            f.write(f"{key.upper()}: {character[key]}\n")
-
-        f.write("INVENTORY: " + ",".join(character["inventory"]) + "\n")
-        f.write("ACTIVE_QUESTS: " + ",".join(character["active_quests"]) + "\n")
-        f.write("COMPLETED_QUESTS: " + ",".join(character["completed_quests"]) + "\n")
+    # Stat fields hold effective values. Equipped items are saved and keep
+    # their bonus in the stats, like equipment from before stat modifiers
+    # existed; inventory_system records it as a modifier again when the slot
+    # next changes. Other modifiers (timed effects) aren't saved, so their
+    # bonuses are taken out or they would become permanent.
+    slots = _equipped_slots(character)
+
+    header = {key: character[key] for key in SAVE_HEADER_FIELDS}
+    modifiers = character.get("stat_modifiers", {})
+    if any(source not in slots for source in modifiers):
+        for source, effects in modifiers.items():
+            if source not in slots:
+                for stat, value in effects.items():
+                    if stat in ("max_health", "strength", "magic"):
+                        header[stat] -= value
+        header["health"] = min(header["health"], header["max_health"])
+
+    # Written to a temporary file and swapped in, so readers see either the
+    # old save or the new one, never a partial write
+    temp_filename = filename + ".tmp"
+
+    with save_file_lock(filename, exclusive=True):
+        try:
+            with open(temp_filename, "w") as f:
+                for key in SAVE_HEADER_FIELDS:
+                    f.write(f"{key.upper()}: {header[key]}\n")
+
+                for key in SAVE_LIST_FIELDS:
+                    f.write(f"{key.upper()}: " + ",".join(character[key]) + "\n")
+
+                for key in SAVE_OPTIONAL_FIELDS:
+                    if key in character:
+                        f.write(f"{key.upper()}: {character[key]}\n")
+
+                # Saves list one id per unit, so stack sizes are kept alongside
+                limits = _stack_limits(character)
+                if limits:
+                    f.write(f"STACK_LIMITS: {_format_stack_limits(limits)}\n")
+
+                for slot in slots:
+                    f.write(f"EQUIPPED_{slot.upper()}: {character[f'equipped_{slot}']}\n")
+                    f.write(f"{slot.upper()}_EFFECT: {character[f'{slot}_effect']}\n")
+
+            os.replace(temp_filename, filename)
+        except BaseException:
+            # Don't leave a half-written temporary file behind
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
 
     return True
 
@@ -76,16 +344,119 @@ def save_character(character, save_directory="data/save_games"):
 # LOAD CHARACTER
 # ============================================================================
 
-def load_character(character_name, save_directory="data/save_games"):
+class LazyCharacter(dict):
+
+    # Returned by load_character(..., header_only=True). Holds only the
+    # header stats; the inventory and quest lists are read from the save the
+    # first time one of them is looked up.
+
+    def __init__(self, header, character_name, save_directory):
+        super().__init__(header)
+        self._source = (character_name, save_directory)
+        self.fully_loaded = False
+
+    def load_body(self):
+        if not self.fully_loaded:
+            full = load_character(*self._source)
+            for key, value in full.items():
+                # Keep header values the caller may have changed meanwhile
+                self.setdefault(key, value)
+            self.fully_loaded = True
+        return self
+
+    def __missing__(self, key):
+        if self.fully_loaded:
+            raise KeyError(key)
+        self.load_body()
+        return self[key]
+
+    def __contains__(self, key):
+        if key in SAVE_LIST_FIELDS or key in SAVE_OPTIONAL_FIELDS:
+            self.load_body()
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key in SAVE_LIST_FIELDS or key in SAVE_OPTIONAL_FIELDS:
+            self.load_body()
+        return super().get(key, default)
+
+
+def _parse_save_line(data, line):
+
+    clean = line.strip()
+    if clean == "":
+        return
+
+    if ":" not in clean:
+        raise InvalidSaveDataError("Bad save file formatting")
+
+    key, value = clean.split(":", 1)
+    key = key.strip()
+    value = value.strip()
+
+    # Save raw value too if needed
+    data[key] = value
+
+    # Parse types automatically
+    if key in ["INVENTORY", "ACTIVE_QUESTS", "COMPLETED_QUESTS"]:
+        data[key.lower()] = value.split(",") if value else []
+    elif key in ["LEVEL","HEALTH","MAX_HEALTH","STRENGTH","MAGIC","EXPERIENCE","GOLD","INVENTORY_CAPACITY"]:
+        data[key.lower()] = int(value) if value else 0
+    elif key == "STACK_LIMITS":
+        data["stack_limits"] = _parse_stack_limits(value)
+    else:
+        data[key.lower()] = value
+
+
+def _load_character_header(filename):
+
+    data = {}
+
+    try:
+        with save_file_lock(filename), open(filename, "r") as f:
+            for line in f:
+                _parse_save_line(data, line)
+
+                # Stop as soon as the stat lines have been read
+                if all(key in data for key in SAVE_HEADER_FIELDS):
+                    break
+    except SaveFileLockedError:
+        raise
+    except (OSError, UnicodeDecodeError):
+        raise SaveFileCorruptedError("Could not read save file")
+    except Exception:
+        raise InvalidSaveDataError("Bad save file formatting")
+
+    validate_character_data(data, header_only=True)
+    return data
+
+
+def load_character(character_name, save_directory="data/save_games", header_only=False):
 
     filename = os.path.join(save_directory, f"{character_name}_save.txt")
 
     if not os.path.exists(filename):
         raise CharacterNotFoundError(f"{character_name} not found")
 
+    if header_only:
+        header = _load_character_header(filename)
+        return LazyCharacter(header, character_name, save_directory)
+
+    try:
+        with save_file_lock(filename):
+            return _read_save_file(filename)
+    except FileNotFoundError:
+        raise CharacterNotFoundError(f"{character_name} not found")
+
+
+def _read_save_file(filename):
+
+    # Read, parse and validate a save; the caller holds its lock
     try:
         with open(filename, "r") as f:
             lines = f.readlines()
+    except FileNotFoundError:
+        raise
     except:
         raise SaveFileCorruptedError("Could not read save file")
 
@@ -93,28 +464,7 @@ def load_character(character_name, save_directory="data/save_games"):
 
     try:
         for line in lines:
-            clean = line.strip()
-            if clean == "":
-                continue
-
-            if ":" not in clean:
-                raise InvalidSaveDataError("Bad save file formatting")
-
-            key, value = clean.split(":", 1)
-            key = key.strip()
-            value = value.strip()
-
-        # Save raw value too if needed
-            data[key] = value
-
-        # Parse types automatically
-            if key in ["INVENTORY", "ACTIVE_QUESTS", "COMPLETED_QUESTS"]:
-                data[key.lower()] = value.split(",") if value else []
-            elif key in ["LEVEL","HEALTH","MAX_HEALTH","STRENGTH","MAGIC","EXPERIENCE","GOLD"]:
-                data[key.lower()] = int(value) if value else 0
-            else:
-                data[key.lower()] = value
-
+            _parse_save_line(data, line)
     except Exception:
         raise InvalidSaveDataError("Bad save file formatting")
 
@@ -137,6 +487,17 @@ def list_saved_characters(save_directory="data/save_games"):
     ]
 
 
+def load_character_headers(save_directory="data/save_games"):
+
+    # Header-only characters for selection menus and matchmaking; saves that
+    # fail to load are skipped
+    for name in list_saved_characters(save_directory):
+        try:
+            yield load_character(name, save_directory, header_only=True)
+        except (SaveFileCorruptedError, InvalidSaveDataError):
+            continue
+
+
 def delete_character(character_name, save_directory="data/save_games"):
 
     filename = os.path.join(save_directory, f"{character_name}_save.txt")
@@ -144,13 +505,362 @@ def delete_character(character_name, save_directory="data/save_games"):
     if not os.path.exists(filename):
         raise CharacterNotFoundError(f"{character_name} does not exist")
 
-    os.remove(filename)
+    # The lock sidecar stays; see save_file_lock
+    with save_file_lock(filename, exclusive=True):
+        os.remove(filename)
     return True
 
+# ============================================================================
+# SAVE DIRECTORY SCANNER
+# ============================================================================
+
+# Number of save files handed to a worker process at a time
+SCAN_BATCH_SIZE = 256
+
+
+def _iter_save_names(save_directory):
+
+    # os.scandir streams the directory instead of building the full listing
+    with os.scandir(save_directory) as entries:
+        for entry in entries:
+            if entry.name.endswith("_save.txt") and entry.is_file():
+                yield entry.name[:-len("_save.txt")]
+
+
+def _batched(iterable, size):
+
+    batch = []
+    for value in iterable:
+        batch.append(value)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _map_batches(func, batches, max_workers, *args):
+
+    # Only a bounded number of batches is in flight at once, so memory stays
+    # flat no matter how many saves the directory holds
+    workers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        for batch in batches:
+            pending.add(pool.submit(func, batch, *args))
+
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in pending:
+            yield future.result()
+
+
+def _check_save_batch(names, save_directory):
+
+    checked = 0
+    problems = []
+    skipped = []
+
+    for name in names:
+        try:
+            # load_character runs validate_character_data on the parsed save
+            load_character(name, save_directory)
+        except (SaveFileCorruptedError, InvalidSaveDataError) as e:
+            problems.append((name, type(e).__name__, str(e)))
+        except CharacterNotFoundError:
+            # Removed while the scan was running
+            continue
+        except SaveFileLockedError:
+            # Held by a writer for longer than the lock timeout
+            skipped.append(name)
+            continue
+        checked += 1
+
+    return checked, problems, skipped
+
+
+def _quarantine_save(name, save_directory, quarantine_directory):
+
+    # Move a bad save aside under its exclusive lock, so a writer can't be
+    # replacing it at the same moment. The file is checked again first: a
+    # save fixed since the scan stays. The lock sidecar stays too (see
+    # save_file_lock). Returns True if the save was moved.
+    filename = os.path.join(save_directory, f"{name}_save.txt")
+
+    with save_file_lock(filename, exclusive=True):
+        try:
+            _read_save_file(filename)
+            return False
+        except FileNotFoundError:
+            return False
+        except (SaveFileCorruptedError, InvalidSaveDataError):
+            pass
+
+        shutil.move(filename, os.path.join(quarantine_directory, f"{name}_save.txt"))
+        return True
+
+
+def scan_save_directory(save_directory="data/save_games", report_file=None,
+                        quarantine_directory=None, max_workers=None):
+    """
+    Load and validate every save in save_directory using a process pool.
+
+    Each corrupt or invalid save is written to report_file as one
+    "name<TAB>ErrorType<TAB>message" line and, if quarantine_directory is
+    given, moved there. Saves still locked by a writer after the lock
+    timeout aren't checked and are listed under 'skipped'.
+
+    Returns: Dictionary with 'scanned', 'problems', 'quarantined' and
+             'skipped'
+    """
+
+    summary = {"scanned": 0, "problems": [], "quarantined": 0, "skipped": []}
+
+    if not os.path.exists(save_directory):
+        return summary
+
+    if quarantine_directory:
+        os.makedirs(quarantine_directory, exist_ok=True)
+
+    report = open(report_file, "w") if report_file else None
+
+    try:
+        batches = _batched(_iter_save_names(save_directory), SCAN_BATCH_SIZE)
+
+        for count, problems, skipped in _map_batches(_check_save_batch, batches,
+                                                     max_workers, save_directory):
+            summary["scanned"] += count
+            summary["skipped"].extend(skipped)
+
+            for name, error, message in problems:
+                summary["problems"].append((name, error))
+
+                if report:
+                    report.write(f"{name}\t{error}\t{message}\n")
+
+                if quarantine_directory:
+                    try:
+                        if _quarantine_save(name, save_directory, quarantine_directory):
+                            summary["quarantined"] += 1
+                    except SaveFileLockedError:
+                        summary["skipped"].append(name)
+    finally:
+        if report:
+            report.close()
+
+    return summary
+
+# ============================================================================
+# BULK EXPORT / IMPORT
+# ============================================================================
+
+# Rows buffered before each write to the export file
+EXPORT_BATCH_SIZE = 500
+# Rows handed to a worker process at a time when importing
+IMPORT_BATCH_SIZE = 256
+
+# Optional fields are left out (JSONL) or blank (CSV) when a save lacks them
+EXPORT_FIELDS = SAVE_HEADER_FIELDS + SAVE_LIST_FIELDS + SAVE_OPTIONAL_FIELDS
+
+
+def _bulk_format(filename, fmt):
+
+    fmt = fmt or os.path.splitext(filename)[1].lstrip(".").lower()
+
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"Unsupported bulk format: {fmt}")
+
+    return fmt
+
+
+def export_characters(output_file, save_directory="data/save_games", fmt=None):
+    """
+    Stream every save in save_directory into a JSONL or CSV file.
+
+    The format comes from fmt or the output file extension. List fields are
+    written as JSON arrays in JSONL and as comma-joined strings in CSV.
+    Stack sizes and equipped items are kept too: as their own fields in
+    JSONL, and in "stack_limits" (item_id:size pairs) and "equipment"
+    (slot=item_id=effect entries) columns in CSV.
+
+    Returns: Dictionary with 'exported' count and 'skipped' save names
+    """
+
+    fmt = _bulk_format(output_file, fmt)
+    summary = {"exported": 0, "skipped": []}
+
+    with open(output_file, "w", newline="") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_FIELDS + ["stack_limits", "equipment"])
+
+        def flush(rows):
+            if writer:
+                writer.writerows(rows)
+            else:
+                f.writelines(rows)
+            rows.clear()
+
+        rows = []
+        names = _iter_save_names(save_directory) if os.path.exists(save_directory) else []
+
+        for name in names:
+            try:
+                character = load_character(name, save_directory)
+            except (CharacterNotFoundError, SaveFileCorruptedError, InvalidSaveDataError):
+                summary["skipped"].append(name)
+                continue
+
+            if writer:
+                rows.append([
+                    ",".join(character[key]) if key in SAVE_LIST_FIELDS else character.get(key, "")
+                    for key in EXPORT_FIELDS
+                ] + [_format_stack_limits(_stack_limits(character)), ";".join(
+                    f"{slot}={character[f'equipped_{slot}']}={character[f'{slot}_effect']}"
+                    for slot in _equipped_slots(character)
+                )])
+            else:
+                rows.append(json.dumps(_export_fields(character)) + "\n")
+
+            summary["exported"] += 1
+            if len(rows) >= EXPORT_BATCH_SIZE:
+                flush(rows)
+
+        flush(rows)
+
+    return summary
+
+
+def _export_fields(character):
+
+    fields = {key: character[key] for key in EXPORT_FIELDS if key in character}
+
+    limits = _stack_limits(character)
+    if limits:
+        fields["stack_limits"] = limits
+
+    for slot in _equipped_slots(character):
+        fields[f"equipped_{slot}"] = character[f"equipped_{slot}"]
+        fields[f"{slot}_effect"] = character[f"{slot}_effect"]
+
+    return fields
+
+
+def _csv_row_to_character(row):
+
+    character = dict(row)
+
+    limits = character.pop("stack_limits", None)
+    if limits:
+        character["stack_limits"] = _parse_stack_limits(limits)
+
+    # Equipment is one column of "slot=item_id=effect" entries split by ";"
+    equipment = character.pop("equipment", None)
+    for entry in equipment.split(";") if equipment else []:
+        slot, item_id, effect = entry.split("=")
+        character[f"equipped_{slot}"] = item_id
+        character[f"{slot}_effect"] = effect
+
+    # Blank (or missing) optional columns mean the save didn't have them
+    for key in SAVE_OPTIONAL_FIELDS:
+        if not character.get(key):
+            character.pop(key, None)
+
+    for key in SAVE_NUMERIC_FIELDS + SAVE_OPTIONAL_FIELDS:
+        value = character.get(key)
+        # Leave bad numbers as strings so validation reports them
+        if value is not None and value.lstrip("-").isdigit():
+            character[key] = int(value)
+
+    for key in SAVE_LIST_FIELDS:
+        if key in character:
+            character[key] = character[key].split(",") if character[key] else []
+
+    return character
+
+
+def _iter_import_rows(input_file, fmt):
+
+    with open(input_file, "r", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            # Raw lines: JSON decoding happens in the worker processes
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def _check_import_name(name):
+
+    # The name becomes the save's file name, so it must stay a single file
+    # inside the save directory
+    if not isinstance(name, str) or not name.strip():
+        raise InvalidSaveDataError("name must be a non-empty string")
+    separators = [os.sep, "/"] + ([os.altsep] if os.altsep else [])
+    if ".." in name or any(c in name for c in separators + ["\n", "\r"]):
+        raise InvalidSaveDataError(f"Invalid character name: {name!r}")
+
+
+def _import_batch(rows, save_directory):
+
+    imported = 0
+    errors = []
+
+    for row_number, row in rows:
+        try:
+            if isinstance(row, str):
+                character = json.loads(row)
+            else:
+                character = _csv_row_to_character(row)
+
+            validate_character_data(character)
+            _check_import_name(character["name"])
+            save_character(_export_fields(character), save_directory)
+            imported += 1
+        except (ValueError, TypeError, InvalidSaveDataError, SaveFileLockedError) as e:
+            errors.append((row_number, str(e)))
+
+    return imported, errors
+
+
+def import_characters(input_file, save_directory="data/save_games", fmt=None, max_workers=None):
+    """
+    Stream characters from a JSONL or CSV export back into save files.
+
+    Rows are parsed, validated and saved in batches on a process pool.
+
+    Returns: Dictionary with 'imported' count and 'errors' as (row, message)
+    """
+
+    fmt = _bulk_format(input_file, fmt)
+    summary = {"imported": 0, "errors": []}
+
+    if not os.path.exists(save_directory):
+        os.makedirs(save_directory)
+
+    rows = enumerate(_iter_import_rows(input_file, fmt), 1)
+
+    for imported, errors in _map_batches(_import_batch, _batched(rows, IMPORT_BATCH_SIZE),
+                                         max_workers, save_directory):
+        summary["imported"] += imported
+        summary["errors"].extend(errors)
+
+    summary["errors"].sort()
+    return summary
+
 # ============================================================================
 # CHARACTER OPERATIONS
 # ============================================================================
 
+@synchronized
 def gain_experience(character, xp_amount):
 
     if character["health"] <= 0:
@@ -169,6 +879,7 @@ def gain_experience(character, xp_amount):
     return character
 
 
+@synchronized
 def add_gold(character, amount):
 
     if character["gold"] + amount < 0:
@@ -178,6 +889,7 @@ def add_gold(character, amount):
     return character["gold"]
 
 
+@synchronized
 def heal_character(character, amount):
 
     before = character["health"]
@@ -194,31 +906,304 @@ def revive_character(character):
     character["health"] = character["max_health"] // 2
     return True
 
+# ============================================================================
+# STAT MODIFIERS
+# ============================================================================
+
+# Character stat fields hold the effective (modified) values that the rest of
+# the game reads. Bonuses are recorded per source in character["stat_modifiers"]
+# and base values are derived as effective - modifier total, so level-ups and
+# permanent boosts that change the stat fields directly keep working and a
+# source can always be removed exactly.
+
+def set_stat_modifier(character, source, effects, already_applied=False):
+
+    # Replace the modifier from source with effects ({stat: value}); only the
+    # difference is applied to the stat fields
+    modifiers = character.setdefault("stat_modifiers", {})
+    old = modifiers.get(source, {})
+
+    if not already_applied:
+        for stat in set(old) | set(effects):
+            delta = effects.get(stat, 0) - old.get(stat, 0)
+            if delta:
+                character[stat] += delta
+
+    if effects:
+        modifiers[source] = dict(effects)
+    elif source in modifiers:
+        del modifiers[source]
+
+    # Keep the running totals current instead of re-summing every source
+    totals = character.get("_modifier_totals")
+    if totals is not None:
+        for stat in set(old) | set(effects):
+            totals[stat] = totals.get(stat, 0) + effects.get(stat, 0) - old.get(stat, 0)
+            if not totals[stat]:
+                del totals[stat]
+
+    if "max_health" in character and character["health"] > character["max_health"]:
+        character["health"] = character["max_health"]
+
+    return character
+
+
+def clear_stat_modifier(character, source):
+
+    return set_stat_modifier(character, source, {})
+
+
+def get_modifier_totals(character):
+
+    # Summed bonus per stat; built once, then updated by set_stat_modifier
+    totals = character.get("_modifier_totals")
+
+    if totals is None:
+        totals = {}
+        for effects in character.get("stat_modifiers", {}).values():
+            for stat, value in effects.items():
+                totals[stat] = totals.get(stat, 0) + value
+        character["_modifier_totals"] = totals
+
+    return totals
+
+
+def get_base_stats(character):
+
+    totals = get_modifier_totals(character)
+    return {
+        stat: character[stat] - totals.get(stat, 0)
+        for stat in ("max_health", "strength", "magic")
+    }
+
+# ============================================================================
+# TIMED EFFECTS
+# ============================================================================
+
+class EffectScheduler:
+
+    # Timed stat effects (buffs, debuffs) that expire after a number of game
+    # or combat ticks. Each effect is a stat modifier with its own source;
+    # active effects sit in a min-heap keyed by expiry tick, so advancing the
+    # clock only touches the effects that actually expire.
+
+    def __init__(self):
+        self.tick = 0
+        self._heap = []
+        self._ids = itertools.count(1)
+
+    def apply(self, character, effects, duration):
+        effect_id = next(self._ids)
+        source = f"effect:{effect_id}"
+
+        set_stat_modifier(character, source, effects)
+        # The unique id breaks ties so characters are never compared
+        heapq.heappush(self._heap, (self.tick + duration, effect_id, character, source))
+        return source
+
+    def advance(self, ticks=1):
+        self.tick += ticks
+        expired = []
+
+        while self._heap and self._heap[0][0] <= self.tick:
+            _, _, character, source = heapq.heappop(self._heap)
+
+            # Skip effects already removed some other way
+            if source in character.get("stat_modifiers", {}):
+                clear_stat_modifier(character, source)
+                expired.append((character, source))
+
+        return expired
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def get_effect_scheduler(character):
+
+    # Each character keeps its own effect clock, so one player's battle
+    # rounds never use up another player's buffs, and the heap goes away
+    # with the character
+    scheduler = character.get("_effects")
+
+    if scheduler is None:
+        scheduler = EffectScheduler()
+        character["_effects"] = scheduler
+
+    return scheduler
+
+# ============================================================================
+# SNAPSHOTS / ROLLBACK
+# ============================================================================
+
+class _CopyOnWrite:
+
+    # Stands in for a list/dict/set field while a snapshot is open. Reads go
+    # to the original shared with the snapshot; the first mutating call makes
+    # a private copy, so the snapshot never sees the change.
+    #
+    # Only the field itself is copied: containers nested inside it are still
+    # shared, so fields must be changed through their own methods or item
+    # assignment, never through a nested container. Use current_value() to
+    # type-check a field that may be wrapped.
+
+    __slots__ = ("_original", "_copy")
+
+    _MUTATORS = {
+        "append", "extend", "insert", "remove", "pop", "clear", "sort",
+        "reverse", "add", "discard", "update", "setdefault", "popitem",
+        "difference_update", "intersection_update",
+        "symmetric_difference_update",
+        # Inventory
+        "set_stack_limit",
+    }
+
+    def __init__(self, original):
+        self._original = original
+        self._copy = None
+
+    def _target(self):
+        return self._original if self._copy is None else self._copy
+
+    def _writable(self):
+        if self._copy is None:
+            self._copy = self._original.copy()
+        return self._copy
+
+    def __getattr__(self, name):
+        if name in self._MUTATORS:
+            return getattr(self._writable(), name)
+        return getattr(self._target(), name)
+
+    def __setitem__(self, key, value):
+        self._writable()[key] = value
+
+    def __delitem__(self, key):
+        del self._writable()[key]
+
+    def __iadd__(self, other):
+        self._writable().extend(other)
+        return self
+
+    def __getitem__(self, key):
+        return self._target()[key]
+
+    def __contains__(self, value):
+        return value in self._target()
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __len__(self):
+        return len(self._target())
+
+    def __eq__(self, other):
+        return self._target() == other
+
+    def __repr__(self):
+        return repr(self._target())
+
+
+# Derived caches other modules keep on a character. They hold nested
+# containers that copy-on-write can't protect, so snapshots leave them alone
+# and a rollback drops them; they are rebuilt the next time they are used.
+SNAPSHOT_CACHE_FIELDS = ["_modifier_totals", "_quest_bits", "_quest_availability"]
+
+
+def current_value(value):
+
+    # The object a field holds, looking through an open snapshot's wrapper
+    if type(value) is _CopyOnWrite:
+        return value._target()
+    return value
+
+
+def snapshot_character(character):
+
+    # Scalars are immutable, so a shallow copy shares them safely. Container
+    # fields are shared too and only copied if they are mutated afterwards.
+    snapshot = dict(character)
+
+    for key, value in snapshot.items():
+        if key in SNAPSHOT_CACHE_FIELDS:
+            continue
+        if callable(getattr(value, "copy", None)):
+            character[key] = _CopyOnWrite(value)
+
+    return snapshot
+
+
+def rollback_character(character, snapshot):
+
+    character.clear()
+    character.update(snapshot)
+
+    # Caches may have been updated in place for the abandoned changes
+    for key in SNAPSHOT_CACHE_FIELDS:
+        character.pop(key, None)
+
+    return character
+
+
+def commit_character(character):
+
+    for key, value in character.items():
+        if type(value) is _CopyOnWrite:
+            character[key] = value._target()
+
+    return character
+
+
+@contextmanager
+def character_transaction(character):
+
+    # Usage: with character_transaction(hero): ...
+    # Any exception inside the block restores the character exactly.
+    snapshot = snapshot_character(character)
+
+    try:
+        yield character
+    except BaseException:
+        rollback_character(character, snapshot)
+        raise
+
+    commit_character(character)
+
 # ============================================================================
 # VALIDATION
 # ============================================================================
 
-def validate_character_data(character):
+def validate_character_data(character, header_only=False):
 
-    required = [
-        "name", "class", "level", "health", "max_health",
-        "strength", "magic", "experience", "gold",
-        "inventory", "active_quests", "completed_quests"
-    ]
+    required = SAVE_HEADER_FIELDS if header_only else SAVE_HEADER_FIELDS + SAVE_LIST_FIELDS
 
     for key in required:
         if key not in character:
             raise InvalidSaveDataError(f"Missing field: {key}")
 
-    numeric = ["level","health","max_health","strength","magic","experience","gold"]
-    for n in numeric:
+    for n in SAVE_NUMERIC_FIELDS:
         if type(character[n]) is not int:
             raise InvalidSaveDataError(f"{n} must be int")
 
-    for l in ["inventory","active_quests","completed_quests"]:
-        if type(character[l]) is not list:
+    for n in SAVE_OPTIONAL_FIELDS:
+        if n in character and type(character[n]) is not int:
+            raise InvalidSaveDataError(f"{n} must be int")
+
+    if header_only:
+        return True
+
+    # Lists, or the list-like containers other modules convert them to
+    for l in SAVE_LIST_FIELDS:
+        value = current_value(character[l])
+        if isinstance(value, (str, dict)) or not callable(getattr(value, "append", None)):
             raise InvalidSaveDataError(f"{l} must be list")
 
+    limits = current_value(character.get("stack_limits", {}))
+    if not isinstance(limits, dict) or any(
+        type(limit) is not int or limit < 1 for limit in limits.values()
+    ):
+        raise InvalidSaveDataError("stack_limits must map item ids to positive ints")
+
     return True
 
 # ============================================================================
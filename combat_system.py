@@ -9,11 +9,17 @@ AI Usage: gave explantaions on code, debugging, and code structures
 Handles combat mechanics
 """
 
+import random
+
+from character_manager import get_effect_scheduler
+from inventory_system import add_item_to_inventory
+from quest_handler import publish_event
 from custom_exceptions import (
     InvalidTargetError,
     CombatNotActiveError,
     CharacterDeadError,
-    AbilityOnCooldownError
+    AbilityOnCooldownError,
+    InventoryFullError
 )
 
 # ============================================================================
@@ -47,6 +53,7 @@ def create_enemy(enemy_type):
      
     return {
         "name": enemy_type.capitalize(),
+        "type": enemy_type,
         "health": base["health"],
         "max_health": base["health"],
         "strength": base["strength"],
@@ -86,10 +93,18 @@ class SimpleBattle:
     Manages combat between character and enemy
     """
     
-    def __init__(self, character, enemy):
-        """Initialize battle with character and enemy"""
+    def __init__(self, character, enemy, effects=None, loot_tables=None):
+        """
+        Initialize battle with character and enemy
+
+        effects: EffectScheduler whose timed effects tick once per round
+                 (default: the character's own effect clock)
+        loot_tables: Loot tables rolled for the enemy on victory
+        """
         self.character = character
         self.enemy = enemy
+        self.loot_tables = loot_tables
+        self.effects = get_effect_scheduler(character) if effects is None else effects
         self.combat_active = True
         self.turn = 1
         pass
@@ -120,6 +135,12 @@ class SimpleBattle:
             if winner:
                 return winner
 
+            # End of round: expire timed buffs
+            for character, source in self.effects.advance():
+                if character is self.character:
+                    display_battle_log("A timed effect wore off.")
+            self.turn += 1
+
         return {"winner": None, "xp_gained": 0, "gold_gained": 0}
         pass
     
@@ -213,8 +234,10 @@ class SimpleBattle:
         """
         if self.enemy["health"] <= 0:
             display_battle_log("Enemy defeated!")
-            rewards = get_victory_rewards(self.enemy)
+            rewards = get_victory_rewards(self.enemy, self.loot_tables)
             self.combat_active = False
+            enemy_type = self.enemy.get("type", self.enemy["name"].lower())
+            rewards["completed_quests"] = publish_event(self.character, "kill", enemy_type)
             return {"winner": "player", **rewards}
 
         if self.character["health"] <= 0:
@@ -317,19 +340,145 @@ def can_character_fight(character):
     return character["health"] > 0
     pass
 
-def get_victory_rewards(enemy):
+def get_victory_rewards(enemy, loot_tables=None, rng=None):
     """
     Return a dict of XP and gold rewards after defeating an enemy.
     Required keys (tests expect):
     - xp
     - gold
+    
+    If loot_tables (from game_data.load_loot_tables) has a table for the
+    enemy type, the rolled drops are added under 'items' as {item_id: qty}.
     """
-    return {
+    rewards = {
         "xp": enemy.get("xp_reward", 0),
         "gold": enemy.get("gold_reward", 0)
     }
+
+    enemy_type = enemy.get("type", enemy.get("name", "").lower())
+    if loot_tables and enemy_type in loot_tables:
+        rewards["items"] = roll_loot(enemy_type, loot_tables, rng)
+
+    return rewards
     pass
 
+# ============================================================================
+# LOOT
+# ============================================================================
+
+class AliasTable:
+    """
+    Weighted random choice using Vose's alias method
+    
+    Setup is O(n) once per table; every sample after that is O(1) no matter
+    how many outcomes the table has.
+    """
+    
+    def __init__(self, outcomes, weights):
+        count = len(weights)
+        total = sum(weights)
+        prob = [weight * count / total for weight in weights]
+        alias = [0] * count
+
+        small = [i for i, p in enumerate(prob) if p < 1]
+        large = [i for i, p in enumerate(prob) if p >= 1]
+
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            alias[low] = high
+            prob[high] = prob[high] + prob[low] - 1
+            (small if prob[high] < 1 else large).append(high)
+
+        # Leftovers are 1 up to float rounding
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.outcomes = list(outcomes)
+        self.prob = prob
+        self.alias = alias
+
+    def sample(self, rng=random):
+        """Return one outcome chosen by weight"""
+        column = int(rng.random() * len(self.prob))
+        if rng.random() < self.prob[column]:
+            return self.outcomes[column]
+        return self.outcomes[self.alias[column]]
+
+def get_alias_table(table):
+    """Build a loot table's AliasTable once and cache it on the table"""
+    alias = table.get("alias")
+
+    if alias is None and table["drops"]:
+        entries, weights = zip(*table["drops"])
+        alias = AliasTable(entries, weights)
+        table["alias"] = alias
+
+    return alias
+
+def roll_loot(table_id, loot_tables, rng=None, drops=None):
+    """
+    Roll a loot table
+    
+    Adds the guaranteed items, then makes ROLLS weighted draws. NOTHING
+    draws drop nothing and @table draws roll that nested table.
+    
+    Returns: Dictionary {item_id: quantity}
+    Raises: InvalidTargetError if the table doesn't exist
+    """
+    if table_id not in loot_tables:
+        raise InvalidTargetError(f"No loot table '{table_id}'.")
+
+    rng = rng or random
+    drops = {} if drops is None else drops
+    table = loot_tables[table_id]
+
+    for item_id, quantity in table["guaranteed"]:
+        drops[item_id] = drops.get(item_id, 0) + quantity
+
+    alias = get_alias_table(table)
+    for _ in range(table["rolls"] if alias else 0):
+        entry = alias.sample(rng)
+
+        if entry == "NOTHING":
+            continue
+        if entry.startswith("@"):
+            roll_loot(entry[1:], loot_tables, rng, drops)
+        else:
+            drops[entry] = drops.get(entry, 0) + 1
+
+    return drops
+
+def award_loot(character, drops, item_data_dict=None):
+    """
+    Add dropped items to the character's inventory
+    
+    Stack sizes come from item_data_dict when given. Items that don't fit
+    are left behind. Items picked up count toward 'collect' quest
+    objectives.
+    
+    Returns: Dictionary {item_id: quantity} of items that didn't fit
+    """
+    left_behind = {}
+
+    for item_id, quantity in drops.items():
+        max_stack = None
+        tags = ()
+        if item_data_dict and item_id in item_data_dict:
+            max_stack = item_data_dict[item_id].get("max_stack", 1)
+            item_type = item_data_dict[item_id].get("type")
+            tags = (item_type,) if item_type else ()
+
+        try:
+            add_item_to_inventory(character, item_id, quantity, max_stack)
+        except InventoryFullError:
+            left_behind[item_id] = quantity
+            continue
+
+        publish_event(character, "collect", item_id, quantity, tags)
+
+    return left_behind
+
 def display_combat_stats(character, enemy):
     """
     Display current combat status
@@ -0,0 +1,215 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Crafting System Module
+
+This module handles crafting items from recipes, including recipes whose
+ingredients are themselves crafted.
+"""
+
+from character_manager import synchronized
+from inventory_system import get_inventory, get_inventory_capacity, _check_quantity
+from custom_exceptions import (
+    InventoryFullError,
+    ItemNotFoundError,
+    InsufficientResourcesError
+)
+
+# ============================================================================
+# RECIPE GRAPH
+# ============================================================================
+
+def get_craft_order(recipe_id, recipe_data_dict):
+    """
+    List every recipe needed to craft recipe_id, each one before the
+    recipes for its ingredients
+
+    The order is worked out once per recipe and cached on the recipe as
+    'order' (recipe data doesn't change while the game runs). The walk is
+    iterative, so deep recipe trees don't hit the recursion limit.
+
+    Returns: List of recipe ids, starting with recipe_id
+    Raises: ItemNotFoundError if there is no such recipe
+    """
+    if recipe_id not in recipe_data_dict:
+        raise ItemNotFoundError(f"No recipe for {recipe_id}.")
+
+    recipe = recipe_data_dict[recipe_id]
+    order = recipe.get("order")
+
+    if order is None:
+        finished = []
+        seen = {recipe_id}
+        path = [recipe_id]
+        ingredients = [iter(recipe["ingredients"])]
+
+        # Depth-first, one ingredient iterator per recipe on the path; a
+        # recipe is finished once all of its ingredients are
+        while ingredients:
+            ingredient = next(ingredients[-1], None)
+
+            if ingredient is None:
+                finished.append(path.pop())
+                ingredients.pop()
+            elif ingredient[0] in recipe_data_dict and ingredient[0] not in seen:
+                seen.add(ingredient[0])
+                path.append(ingredient[0])
+                ingredients.append(iter(recipe_data_dict[ingredient[0]]["ingredients"]))
+
+        # Reverse post-order: a recipe comes before everything it uses
+        order = finished[::-1]
+        recipe["order"] = order
+
+    return order
+
+# ============================================================================
+# CRAFTING
+# ============================================================================
+
+@synchronized
+def plan_craft(character, recipe_id, recipe_data_dict, quantity=1):
+    """
+    Work out what crafting quantity units of recipe_id would take
+
+    Held items are used first. Anything short that has its own recipe is
+    crafted from its ingredients, all the way down; extra units from a
+    crafted batch are kept.
+
+    Returns: Dictionary with
+        'crafts': {recipe_id: times crafted}
+        'consumed': {item_id: units taken from the inventory}
+        'produced': {item_id: units added to the inventory}
+        'missing': {item_id: units still needed}
+    Raises:
+        ValueError if quantity is less than 1
+        ItemNotFoundError if there is no such recipe
+    """
+    _check_quantity(quantity)
+    order = get_craft_order(recipe_id, recipe_data_dict)
+    inventory = get_inventory(character)
+
+    crafts = {}
+    consumed = {}
+    produced = {}
+    missing = {}
+    demand = {recipe_id: quantity}
+
+    for current in order:
+        recipe = recipe_data_dict[current]
+        needed = demand.get(current, 0)
+
+        # The target is always crafted; intermediates come from stock first
+        if current != recipe_id:
+            used = min(needed, inventory.count(current))
+            if used:
+                consumed[current] = used
+            needed -= used
+
+        if needed <= 0:
+            continue
+
+        times = -(-needed // recipe["yield"])
+        crafts[current] = times
+        made = times * recipe["yield"]
+        kept = made if current == recipe_id else made - needed
+        if kept:
+            produced[current] = kept
+
+        for item_id, amount in recipe["ingredients"]:
+            demand[item_id] = demand.get(item_id, 0) + amount * times
+
+    for item_id, needed in demand.items():
+        if item_id in recipe_data_dict:
+            continue
+
+        used = min(needed, inventory.count(item_id))
+        if used:
+            consumed[item_id] = used
+        if needed > used:
+            missing[item_id] = needed - used
+
+    return {"crafts": crafts, "consumed": consumed, "produced": produced, "missing": missing}
+
+def can_craft(character, recipe_id, recipe_data_dict, quantity=1):
+    """
+    Check whether the character can craft quantity units of recipe_id
+
+    Returns: Tuple (True/False, {item_id: units missing})
+    Raises:
+        ValueError if quantity is less than 1
+        ItemNotFoundError if there is no such recipe
+    """
+    missing = plan_craft(character, recipe_id, recipe_data_dict, quantity)["missing"]
+    return not missing, missing
+
+@synchronized
+def craft_item(character, recipe_id, recipe_data_dict, quantity=1, item_data_dict=None):
+    """
+    Craft quantity units of recipe_id, including any crafted ingredients
+
+    Either the whole batch is crafted or nothing changes. Stack sizes for
+    new items come from item_data_dict when given.
+
+    Returns: Dictionary {item_id: units added to the inventory}
+    Raises:
+        ValueError if quantity is less than 1
+        ItemNotFoundError if there is no such recipe
+        InsufficientResourcesError if ingredients are missing
+        InventoryFullError if the results would not fit
+    """
+    plan = plan_craft(character, recipe_id, recipe_data_dict, quantity)
+    inventory = get_inventory(character)
+
+    if plan["missing"]:
+        needed = ", ".join(f"{item_id} x{amount}" for item_id, amount in plan["missing"].items())
+        raise InsufficientResourcesError(f"Cannot craft {recipe_id}, missing: {needed}")
+
+    max_stacks = {}
+    for item_id in plan["produced"]:
+        if item_data_dict and item_id in item_data_dict:
+            max_stacks[item_id] = item_data_dict[item_id].get("max_stack", 1)
+
+    # Net stack change across every item the batch touches
+    extra_stacks = 0
+    for item_id in set(plan["consumed"]) | set(plan["produced"]):
+        change = plan["produced"].get(item_id, 0) - plan["consumed"].get(item_id, 0)
+        extra_stacks += inventory.stacks_needed(item_id, change, max_stacks.get(item_id))
+
+    if inventory.stack_count + extra_stacks > get_inventory_capacity(character):
+        raise InventoryFullError("Not enough inventory space to craft this.")
+
+    for item_id, amount in plan["consumed"].items():
+        inventory.remove(item_id, amount)
+
+    for item_id, amount in plan["produced"].items():
+        inventory.add(item_id, amount, max_stacks.get(item_id))
+
+    return plan["produced"]
+
+def display_recipes(character, recipe_data_dict):
+    """
+    Display each recipe and whether the character can craft it
+    """
+    print("\n=== RECIPES ===")
+
+    for recipe_id, recipe in recipe_data_dict.items():
+        ingredients = ", ".join(f"{item_id} x{amount}" for item_id, amount in recipe["ingredients"])
+        ready, missing = can_craft(character, recipe_id, recipe_data_dict)
+        status = "ready" if ready else "missing " + ", ".join(missing)
+        print(f"{recipe_id} x{recipe['yield']} <- {ingredients} ({status})")
+
+# ============================================================================
+# TESTING
+# ============================================================================
+
+if __name__ == "__main__":
+    print("=== CRAFTING SYSTEM TEST ===")
+
+    from game_data import load_recipes, load_items
+
+    recipes = load_recipes()
+    items = load_items()
+    test_char = {"inventory": ["iron_sword", "strength_elixir", "strength_elixir"]}
+
+    print(can_craft(test_char, "steel_sword", recipes))
+    print(craft_item(test_char, "steel_sword", recipes, item_data_dict=items))
+    print(can_craft(test_char, "berserker_axe", recipes))
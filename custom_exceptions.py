@@ -123,3 +123,6 @@ class InvalidSaveDataError(GameError):
     """Raised when save file contains invalid data"""
     pass
 
+class SaveFileLockedError(GameError):
+    """Raised when a save file lock cannot be acquired in time"""
+    pass
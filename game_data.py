@@ -16,6 +16,53 @@ from custom_exceptions import (
     CorruptedDataError
 )
 
+# ============================================================================
+# DATA CATALOG
+# ============================================================================
+
+class DataCatalog(dict):
+    """
+    Dictionary of loaded game data that counts its own changes
+
+    version goes up whenever an entry is added, replaced or removed, so
+    anything cached from the data (rendered text, indexes) can tell when
+    it is out of date. Edits made inside an entry's own dictionary are not
+    counted; replace the entry instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
@@ -33,7 +80,14 @@ def load_quests(filename="data/quests.txt"):
     REQUIRED_LEVEL: 1
     PREREQUISITE: previous_quest_id (or NONE)
     
-    Returns: Dictionary of quests {quest_id: quest_data_dict}
+    PREREQUISITE can also list several quests: "a,b" needs all of them and
+    "a|b" needs any one. Prerequisites must not form a cycle.
+    
+    An optional OBJECTIVES line lists what completes the quest
+    automatically, e.g. "kill:goblin:3" or "buy:weapon|armor:1,
+    collect:any:5:distinct" (see parse_objectives).
+    
+    Returns: DataCatalog of quests {quest_id: quest_data_dict}
     Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
     """
     # TODO: Implement this function
@@ -46,7 +100,7 @@ def load_quests(filename="data/quests.txt"):
         raise MissingDataFileError(f"Quest file '{filename}' not found.")
 
     try:
-        quests = {}
+        quests = DataCatalog()
         with open(filename, "r") as f:
             block = []
             for line in f:
@@ -65,6 +119,7 @@ def load_quests(filename="data/quests.txt"):
                 validate_quest_data(quest)
                 quests[quest["quest_id"]] = quest
 
+        validate_quest_links(quests)
         return quests
 
     except InvalidDataFormatError:
@@ -80,34 +135,38 @@ def load_items(filename="data/items.txt"):
     Expected format per item (separated by blank lines):
     ITEM_ID: unique_item_name
     NAME: Item Display Name
-    TYPE: weapon|armor|consumable
-    EFFECT: stat_name:value (e.g., strength:5 or health:20)
+    TYPE: weapon|armor|helmet|ring|amulet|consumable
+    EFFECT: stat_name:value[,stat_name:value...] (e.g., strength:5 or
+            strength:12,magic:-3)
     COST: 100
     DESCRIPTION: Item description
+    MAX_STACK: 99 (optional, units per inventory slot, default 1)
+    DURATION: 3 (optional, consumables only: ticks a stat boost lasts)
     
-    Returns: Dictionary of items {item_id: item_data_dict}
+    Each item also gets an 'effects' dictionary {stat: value} compiled from
+    EFFECT, so effects are never re-parsed when items are used.
+    
+    Returns: DataCatalog of items {item_id: item_data_dict}
     Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
     """
     if not os.path.exists(filename):
         raise MissingDataFileError(f"Item file '{filename}' not found.")
 
     try:
-        items = {}
+        items = DataCatalog()
         with open(filename, "r") as f:
             block = []
             for line in f:
                 if line.strip() == "":
                     if block:
-                        item = parse_item_block(block)
-                        validate_item_data(item)
+                        item = build_item(block)
                         items[item["item_id"]] = item
                         block = []
                 else:
                     block.append(line.strip())
 
             if block:
-                item = parse_item_block(block)
-                validate_item_data(item)
+                item = build_item(block)
                 items[item["item_id"]] = item
 
         return items
@@ -118,6 +177,97 @@ def load_items(filename="data/items.txt"):
         raise CorruptedDataError(f"Could not parse item data: {e}")
         pass
 
+def load_loot_tables(filename="data/loot_tables.txt"):
+    """
+    Load enemy loot tables from file
+    
+    Expected format per table (separated by blank lines):
+    TABLE_ID: goblin (enemy type, or a shared table name)
+    ROLLS: 1
+    GUARANTEED: item_id:quantity,... (or NONE)
+    DROPS: NOTHING:60,health_potion:30,@common_gear:10
+    
+    DROPS lists weighted entries. NOTHING means no drop and @table_id rolls
+    another table (nested tables must not form a cycle).
+    
+    Returns: DataCatalog of tables {table_id: table_dict}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Loot table file '{filename}' not found.")
+
+    try:
+        tables = DataCatalog()
+        with open(filename, "r") as f:
+            block = []
+            for line in f:
+                if line.strip() == "":
+                    if block:
+                        table = parse_loot_block(block)
+                        validate_loot_table_data(table)
+                        tables[table["table_id"]] = table
+                        block = []
+                else:
+                    block.append(line.strip())
+
+            if block:
+                table = parse_loot_block(block)
+                validate_loot_table_data(table)
+                tables[table["table_id"]] = table
+
+        validate_loot_table_links(tables)
+        return tables
+
+    except InvalidDataFormatError:
+        raise
+    except Exception as e:
+        raise CorruptedDataError(f"Could not parse loot table data: {e}")
+
+def load_recipes(filename="data/recipes.txt"):
+    """
+    Load crafting recipes from file
+    
+    Expected format per recipe (separated by blank lines):
+    RECIPE_ID: item_id (the item this recipe makes)
+    YIELD: 1
+    INGREDIENTS: item_id:quantity,item_id:quantity
+    
+    An ingredient can itself have a recipe, but recipes must not form a
+    cycle.
+    
+    Returns: DataCatalog of recipes {recipe_id: recipe_dict}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Recipe file '{filename}' not found.")
+
+    try:
+        recipes = DataCatalog()
+        with open(filename, "r") as f:
+            block = []
+            for line in f:
+                if line.strip() == "":
+                    if block:
+                        recipe = parse_recipe_block(block)
+                        validate_recipe_data(recipe)
+                        recipes[recipe["recipe_id"]] = recipe
+                        block = []
+                else:
+                    block.append(line.strip())
+
+            if block:
+                recipe = parse_recipe_block(block)
+                validate_recipe_data(recipe)
+                recipes[recipe["recipe_id"]] = recipe
+
+        validate_recipe_links(recipes)
+        return recipes
+
+    except InvalidDataFormatError:
+        raise
+    except Exception as e:
+        raise CorruptedDataError(f"Could not parse recipe data: {e}")
+
 def validate_quest_data(quest_dict):
     """
     Validate that quest dictionary has all required fields
@@ -145,15 +295,43 @@ def validate_quest_data(quest_dict):
         if not isinstance(quest_dict[num], int):
             raise InvalidDataFormatError(f"Expected integer for {num}")
 
+    # PREREQUISITE: NONE, quest_id, "a,b" (all of) or "a|b" (any of)
+    parse_prerequisites(quest_dict["prerequisite"])
+
+    # OBJECTIVES is optional
+    if "objectives" in quest_dict:
+        parse_objectives(quest_dict["objectives"])
+
     return True
     pass
 
+def validate_quest_links(quests):
+    """
+    Check that no quest requires itself, directly or through others
+    
+    Prerequisites that aren't in the file are left to
+    quest_handler.validate_quest_prerequisites.
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError on a cycle
+    """
+    graph = {
+        quest_id: parse_prerequisites(quest["prerequisite"])[1]
+        for quest_id, quest in quests.items()
+    }
+
+    cycle = find_cycle(graph)
+    if cycle:
+        raise InvalidDataFormatError("Quest prerequisite cycle: " + " -> ".join(cycle))
+
+    return True
+
 def validate_item_data(item_dict):
     """
     Validate that item dictionary has all required fields
     
     Required fields: item_id, name, type, effect, cost, description
-    Valid types: weapon, armor, consumable
+    Valid types: weapon, armor, helmet, ring, amulet, consumable
     
     Returns: True if valid
     Raises: InvalidDataFormatError if missing required fields or invalid type
@@ -164,24 +342,118 @@ def validate_item_data(item_dict):
         if key not in item_dict:
             raise InvalidDataFormatError(f"Missing item field: {key}")
 
-    valid_types = {"weapon", "armor", "consumable"}
+    valid_types = {"weapon", "armor", "helmet", "ring", "amulet", "consumable"}
     if item_dict["type"] not in valid_types:
         raise InvalidDataFormatError(f"Invalid item type: {item_dict['type']}")
 
     if not isinstance(item_dict["cost"], int):
         raise InvalidDataFormatError("Item cost must be an integer.")
 
-    # EFFECT format: "stat:value"
-    if ":" not in item_dict["effect"]:
-        raise InvalidDataFormatError("Invalid effect format. Expected stat:value")
+    if "max_stack" in item_dict:
+        if not isinstance(item_dict["max_stack"], int) or item_dict["max_stack"] < 1:
+            raise InvalidDataFormatError("Item max stack must be a positive integer.")
 
-    stat, value = item_dict["effect"].split(":", 1)
-    if not value.isdigit():
-        raise InvalidDataFormatError("Item effect value must be an integer.")
+    if "duration" in item_dict:
+        if not isinstance(item_dict["duration"], int) or item_dict["duration"] < 1:
+            raise InvalidDataFormatError("Item duration must be a positive integer.")
+        if item_dict["type"] != "consumable":
+            raise InvalidDataFormatError("Only consumables can have a duration.")
+
+    # EFFECT format: "stat:value" or several joined by commas
+    parse_effect_string(item_dict["effect"])
 
     return True
     pass
 
+def validate_loot_table_data(table_dict):
+    """
+    Validate that a loot table has all required fields
+    
+    Required fields: table_id, rolls, guaranteed, drops
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError if fields are missing or invalid
+    """
+    required = ["table_id", "rolls", "guaranteed", "drops"]
+
+    for key in required:
+        if key not in table_dict:
+            raise InvalidDataFormatError(f"Missing loot table field: {key}")
+
+    if not table_dict["drops"] and not table_dict["guaranteed"]:
+        raise InvalidDataFormatError(f"Loot table '{table_dict['table_id']}' has no drops.")
+
+    for entry, weight in table_dict["drops"]:
+        if weight <= 0:
+            raise InvalidDataFormatError(f"Drop weight for {entry} must be positive.")
+
+    return True
+
+def validate_loot_table_links(tables):
+    """
+    Check that every @table reference exists and nesting has no cycles
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError on a missing table or a cycle
+    """
+    graph = {}
+    for table_id, table in tables.items():
+        graph[table_id] = [entry[1:] for entry, _ in table["drops"] if entry.startswith("@")]
+        for nested in graph[table_id]:
+            if nested not in tables:
+                raise InvalidDataFormatError(f"Unknown loot table: {nested}")
+
+    cycle = find_cycle(graph)
+    if cycle:
+        raise InvalidDataFormatError("Loot table cycle: " + " -> ".join(cycle))
+
+    return True
+
+def validate_recipe_data(recipe_dict):
+    """
+    Validate that a recipe has all required fields
+    
+    Required fields: recipe_id, yield, ingredients
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError if fields are missing or invalid
+    """
+    required = ["recipe_id", "yield", "ingredients"]
+
+    for key in required:
+        if key not in recipe_dict:
+            raise InvalidDataFormatError(f"Missing recipe field: {key}")
+
+    if recipe_dict["yield"] < 1:
+        raise InvalidDataFormatError("Recipe yield must be a positive integer.")
+
+    if not recipe_dict["ingredients"]:
+        raise InvalidDataFormatError(f"Recipe '{recipe_dict['recipe_id']}' has no ingredients.")
+
+    for item_id, quantity in recipe_dict["ingredients"]:
+        if quantity < 1:
+            raise InvalidDataFormatError(f"Ingredient quantity for {item_id} must be positive.")
+
+    return True
+
+def validate_recipe_links(recipes):
+    """
+    Check that no recipe needs its own output, directly or through others
+    
+    Returns: True if valid
+    Raises: InvalidDataFormatError on a cycle
+    """
+    graph = {
+        recipe_id: [item_id for item_id, _ in recipe["ingredients"] if item_id in recipes]
+        for recipe_id, recipe in recipes.items()
+    }
+
+    cycle = find_cycle(graph)
+    if cycle:
+        raise InvalidDataFormatError("Recipe cycle: " + " -> ".join(cycle))
+
+    return True
+
 def create_default_data_files():
     """
     Create default data files if they don't exist
@@ -221,6 +493,177 @@ def create_default_data_files():
 # HELPER FUNCTIONS
 # ============================================================================
 
+def parse_effect_string(effect_string):
+    """
+    Compile an effect string into a dictionary of stat changes
+    
+    Args:
+        effect_string: "stat:value" pairs separated by commas, e.g.
+                       "strength:5,magic:3,max_health:-10"
+    
+    Returns: Dictionary {stat_name: value}
+    Raises: InvalidDataFormatError if a pair is malformed
+    """
+    effects = {}
+
+    for pair in effect_string.split(","):
+        if ":" not in pair:
+            raise InvalidDataFormatError("Invalid effect format. Expected stat:value")
+
+        stat, value = pair.split(":", 1)
+        stat = stat.strip()
+
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise InvalidDataFormatError("Item effect value must be an integer.")
+
+        if not stat:
+            raise InvalidDataFormatError("Item effect is missing a stat name.")
+
+        effects[stat] = effects.get(stat, 0) + value
+
+    return effects
+
+def parse_pair_list(value, key):
+    """
+    Parse "name:number,name:number" (or NONE) into [(name, number)]
+    
+    Returns: List of (name, int) tuples
+    Raises: InvalidDataFormatError if a pair is malformed
+    """
+    pairs = []
+    for pair in ([] if value == "NONE" else value.split(",")):
+        entry, _, number = pair.strip().rpartition(":")
+        if not entry or not number.isdigit():
+            raise InvalidDataFormatError(f"Expected name:number in {key}: {pair}")
+        pairs.append((entry, int(number)))
+    return pairs
+
+def find_cycle(graph):
+    """
+    Find a cycle in a dependency graph {node: [nodes it depends on]}
+    
+    Iterative depth-first search with white/grey/black colouring, so deep
+    dependency lines don't hit the recursion limit. The current path is
+    kept on one list instead of being copied at each step.
+    
+    Returns: List of nodes forming the cycle (first node repeated at the
+             end), or None if the graph is acyclic
+    """
+    state = {}
+
+    for start in graph:
+        if start in state:
+            continue
+
+        state[start] = "visiting"
+        path = [start]
+        children = [iter(graph.get(start, ()))]
+
+        while children:
+            child = next(children[-1], None)
+
+            if child is None:
+                state[path.pop()] = "done"
+                children.pop()
+            elif state.get(child) == "visiting":
+                return path[path.index(child):] + [child]
+            elif child not in state:
+                state[child] = "visiting"
+                path.append(child)
+                children.append(iter(graph.get(child, ())))
+
+    return None
+
+def parse_prerequisites(prereq_string):
+    """
+    Parse a quest PREREQUISITE value
+    
+    "NONE" -> ("all", []), "a" or "a,b" -> ("all", [...]),
+    "a|b" -> ("any", [...])
+    
+    Returns: Tuple (mode, list of quest ids)
+    Raises: InvalidDataFormatError if the value is malformed or mixes , and |
+    """
+    if prereq_string == "NONE":
+        return "all", []
+
+    if "," in prereq_string and "|" in prereq_string:
+        raise InvalidDataFormatError(f"Cannot mix ',' and '|' in prerequisite: {prereq_string}")
+
+    mode, separator = ("any", "|") if "|" in prereq_string else ("all", ",")
+    quest_ids = [part.strip() for part in prereq_string.split(separator)]
+
+    if not all(quest_ids):
+        raise InvalidDataFormatError(f"Empty quest id in prerequisite: {prereq_string}")
+
+    return mode, quest_ids
+
+# Events a quest objective can listen for
+OBJECTIVE_EVENTS = ("kill", "collect", "buy")
+
+def parse_objectives(objective_string):
+    """
+    Parse a quest OBJECTIVES value
+    
+    Objectives are comma-separated, each "event:target:count" with an
+    optional ":distinct" suffix:
+        "kill:goblin:3"             kill three goblins
+        "buy:weapon|armor:1"        buy one weapon or armor ('|' = any of)
+        "collect:any:5:distinct"    pick up five different items
+    Targets are enemy types for kill events and item ids or item types for
+    collect/buy; "any" matches every target. All objectives must be met.
+    "NONE" -> []
+    
+    Returns: List of dictionaries with 'event', 'targets', 'count' and
+             'distinct'
+    Raises: InvalidDataFormatError if an objective is malformed
+    """
+    if objective_string == "NONE":
+        return []
+
+    objectives = []
+
+    for part in objective_string.split(","):
+        fields = [field.strip() for field in part.split(":")]
+
+        if len(fields) not in (3, 4) or (len(fields) == 4 and fields[3] != "distinct"):
+            raise InvalidDataFormatError(f"Invalid objective format: {part}")
+
+        event, targets, count = fields[:3]
+
+        if event not in OBJECTIVE_EVENTS:
+            raise InvalidDataFormatError(f"Unknown objective event: {event}")
+
+        targets = targets.split("|")
+        if not all(targets):
+            raise InvalidDataFormatError(f"Empty target in objective: {part}")
+
+        if not count.isdigit() or int(count) < 1:
+            raise InvalidDataFormatError(f"Objective count must be a positive number: {part}")
+
+        objectives.append({
+            "event": event,
+            "targets": targets,
+            "count": int(count),
+            "distinct": len(fields) == 4
+        })
+
+    return objectives
+
+def build_item(lines):
+    """
+    Parse, validate and compile one item block
+    
+    Returns: Item dictionary including its compiled 'effects'
+    Raises: InvalidDataFormatError if the block is invalid
+    """
+    item = parse_item_block(lines)
+    validate_item_data(item)
+    item["effects"] = parse_effect_string(item["effect"])
+    return item
+
 def parse_quest_block(lines):
     """
     Parse a block of lines into a quest dictionary
@@ -239,7 +682,8 @@ def parse_quest_block(lines):
         "REWARD_XP": "reward_xp",
         "REWARD_GOLD": "reward_gold",
         "REQUIRED_LEVEL": "required_level",
-        "PREREQUISITE": "prerequisite"
+        "PREREQUISITE": "prerequisite",
+        "OBJECTIVES": "objectives"
     }
 
     for line in lines:
@@ -264,6 +708,88 @@ def parse_quest_block(lines):
     return quest
     pass
 
+def parse_loot_block(lines):
+    """
+    Parse a block of lines into a loot table dictionary
+    
+    Args:
+        lines: List of strings representing one loot table
+    
+    Returns: Dictionary with 'guaranteed' as [(item_id, quantity)] and
+             'drops' as [(entry, weight)]
+    Raises: InvalidDataFormatError if parsing fails
+    """
+    table = {}
+    expected_fields = {
+        "TABLE_ID": "table_id",
+        "ROLLS": "rolls",
+        "GUARANTEED": "guaranteed",
+        "DROPS": "drops"
+    }
+
+    for line in lines:
+        if ": " not in line:
+            raise InvalidDataFormatError(f"Invalid loot table line: {line}")
+
+        key, value = line.split(": ", 1)
+
+        if key not in expected_fields:
+            raise InvalidDataFormatError(f"Unexpected loot table field: {key}")
+
+        mapped_key = expected_fields[key]
+
+        if mapped_key == "rolls":
+            if not value.isdigit():
+                raise InvalidDataFormatError("Expected number for ROLLS")
+            value = int(value)
+
+        elif mapped_key in ["guaranteed", "drops"]:
+            value = parse_pair_list(value, key)
+
+        table[mapped_key] = value
+
+    return table
+
+def parse_recipe_block(lines):
+    """
+    Parse a block of lines into a recipe dictionary
+    
+    Args:
+        lines: List of strings representing one recipe
+    
+    Returns: Dictionary with 'ingredients' as [(item_id, quantity)]
+    Raises: InvalidDataFormatError if parsing fails
+    """
+    recipe = {}
+    expected_fields = {
+        "RECIPE_ID": "recipe_id",
+        "YIELD": "yield",
+        "INGREDIENTS": "ingredients"
+    }
+
+    for line in lines:
+        if ": " not in line:
+            raise InvalidDataFormatError(f"Invalid recipe line: {line}")
+
+        key, value = line.split(": ", 1)
+
+        if key not in expected_fields:
+            raise InvalidDataFormatError(f"Unexpected recipe field: {key}")
+
+        mapped_key = expected_fields[key]
+
+        if mapped_key == "yield":
+            if not value.isdigit():
+                raise InvalidDataFormatError("Expected number for YIELD")
+            value = int(value)
+
+        elif mapped_key == "ingredients":
+            value = parse_pair_list(value, key)
+
+        recipe[mapped_key] = value
+
+    return recipe
+
 def parse_item_block(lines):
     """
     Parse a block of lines into an item dictionary
@@ -281,7 +807,9 @@ def parse_item_block(lines):
         "TYPE": "type",
         "EFFECT": "effect",
         "COST": "cost",
-        "DESCRIPTION": "description"
+        "DESCRIPTION": "description",
+        "MAX_STACK": "max_stack",
+        "DURATION": "duration"
     }
 
     for line in lines:
@@ -300,6 +828,11 @@ def parse_item_block(lines):
                 raise InvalidDataFormatError("Item cost must be a number.")
             value = int(value)
 
+        if mapped_key in ["max_stack", "duration"]:
+            if not value.isdigit():
+                raise InvalidDataFormatError(f"Expected number for {key}")
+            value = int(value)
+
         item[mapped_key] = value
 
     return item
@@ -1,4 +1,13 @@
-from character_manager import heal_character
+from character_manager import (
+    heal_character,
+    character_lock,
+    synchronized,
+    character_transaction,
+    current_value,
+    set_stat_modifier,
+    clear_stat_modifier,
+    get_effect_scheduler
+)
 
 """
 COMP 163 - Project 3: Quest Chronicles
@@ -11,6 +20,11 @@ AI Usage: debugging and code structure
 This module handles inventory management, item usage, and equipment.
 """
 
+import time
+from bisect import bisect_left, insort
+
+from game_data import parse_effect_string
+from quest_handler import publish_event
 from custom_exceptions import (
     InventoryFullError,
     ItemNotFoundError,
@@ -18,55 +32,392 @@ from custom_exceptions import (
     InvalidItemTypeError
 )
 
-# Maximum inventory size
+# NumPy is optional; shop prices fall back to plain lists without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Default inventory size; characters can set their own up to the cap
 MAX_INVENTORY_SIZE = 20
+MAX_INVENTORY_CAPACITY = 5000
+
+# Sorted inventory views (see Inventory.sorted_items)
+INVENTORY_VIEWS = ("name", "type", "value")
+
+# Dynamic shop pricing
+PRICE_UPDATE_INTERVAL = 60.0   # seconds between price recomputes
+PRICE_SENSITIVITY = 0.5        # largest fraction a price can move either way
+PRICE_DAMPING = 10             # trade volume before prices move noticeably
+PRICE_VOLUME_DECAY = 0.5       # share of recorded volume kept per recompute
+
+# Equipment slots for each equippable item type; an item fills one slot
+EQUIPMENT_SLOTS = {
+    "weapon": ["weapon"],
+    "armor": ["armor"],
+    "helmet": ["helmet"],
+    "ring": ["ring_1", "ring_2"],
+    "amulet": ["amulet"],
+}
+
+# ============================================================================
+# INVENTORY CONTAINER
+# ============================================================================
+
+class Inventory:
+    """
+    Inventory container that replaces the plain list of item ids
+
+    Keeps an item_id -> quantity map in first-insertion order, so membership,
+    counting and removal are O(1). Iterating yields each item id once per
+    unit held, so saves still serialize as a comma-separated list of ids.
+
+    Capacity is counted in stacks: each item id has a max stack size
+    (1 unless set), and a running stack total is kept as quantities change.
+
+    Sorted views (by name, type or value) are built the first time they are
+    asked for and then kept sorted with bisect as item ids come and go.
+
+    version goes up on every change, and the ids whose quantity changed
+    since the last display are remembered so display_inventory() only
+    re-renders those lines.
+    """
+
+    def __init__(self, items=()):
+        self._counts = {}
+        self._limits = {}
+        self._size = 0
+        self._stacks = 0
+        self._views = {}
+        self._view_keys = {}
+        self._catalog = None
+        self._catalog_version = None
+        self._version = 0
+        self._changed = set()
+        self._render = {}
+
+        for item_id in items:
+            self.append(item_id)
+
+    def _stacks_for(self, item_id, count):
+        limit = self._limits.get(item_id, 1)
+        return -(-count // limit)
+
+    def _set_count(self, item_id, count):
+        old = self._counts.get(item_id, 0)
+        self._stacks += self._stacks_for(item_id, count) - self._stacks_for(item_id, old)
+        self._size += count - old
+        self._version += 1
+        self._changed.add(item_id)
+
+        if count:
+            self._counts[item_id] = count
+        else:
+            del self._counts[item_id]
+
+        # Views only change when an item id appears or disappears. Removal
+        # uses the key the item was inserted under, in case its catalog
+        # entry has been replaced since.
+        if self._views and (old == 0) != (count == 0):
+            for view, keys in self._views.items():
+                inserted = self._view_keys[view]
+                if count:
+                    key = self._view_key(view, item_id)
+                    insort(keys, key)
+                    inserted[item_id] = key
+                else:
+                    del keys[bisect_left(keys, inserted.pop(item_id))]
+
+    def _view_key(self, view, item_id):
+        data = self._catalog.get(item_id, {})
+        name = data.get("name", item_id)
+        if view == "type":
+            return (data.get("type", "unknown"), name, item_id)
+        if view == "value":
+            return (data.get("cost", 0), name, item_id)
+        return (name, item_id)
+
+    def add(self, item_id, quantity=1, max_stack=None):
+        """Add quantity units of item_id, optionally setting its stack size"""
+        _check_quantity(quantity)
+        if max_stack is not None:
+            self.set_stack_limit(item_id, max_stack)
+        self._set_count(item_id, self._counts.get(item_id, 0) + quantity)
+
+    def append(self, item_id):
+        """Add one unit of item_id"""
+        self.add(item_id)
+
+    def remove(self, item_id, quantity=1):
+        """Remove quantity units of item_id (ValueError if not held, like list.remove)"""
+        _check_quantity(quantity)
+        count = self._counts.get(item_id, 0)
+        if count < quantity:
+            raise ValueError(f"{item_id} not in inventory")
+
+        self._set_count(item_id, count - quantity)
+
+    def set_stack_limit(self, item_id, max_stack):
+        """Set how many units of item_id fit in one stack"""
+        count = self._counts.get(item_id, 0)
+        old_stacks = self._stacks_for(item_id, count)
+        self._limits[item_id] = max(1, max_stack)
+        self._stacks += self._stacks_for(item_id, count) - old_stacks
+        self._version += 1
+
+    def stack_limits(self):
+        """Return {item_id: stack size} for held items that stack above 1"""
+        return {
+            item_id: limit for item_id, limit in self._limits.items()
+            if limit > 1 and item_id in self._counts
+        }
+
+    def stacks_needed(self, item_id, quantity, max_stack=None):
+        """Return how many more stacks adding quantity units would use"""
+        limit = self._limits.get(item_id, 1) if max_stack is None else max(1, max_stack)
+        count = self._counts.get(item_id, 0)
+        return -(-(count + quantity) // limit) - self._stacks_for(item_id, count)
+
+    @property
+    def version(self):
+        """Change counter, bumped by every mutation"""
+        return self._version
+
+    @property
+    def stack_count(self):
+        """Number of inventory slots in use"""
+        return self._stacks
+
+    def count(self, item_id):
+        """Return how many units of item_id are held"""
+        return self._counts.get(item_id, 0)
+
+    def items(self):
+        """Return (item_id, quantity) pairs in first-insertion order"""
+        return self._counts.items()
+
+    def sorted_items(self, view, item_data_dict):
+        """
+        Return (item_id, quantity) pairs ordered by name, type or value
+
+        Names, types and costs come from item_data_dict; unknown items sort
+        as type "unknown" with value 0. Passing a different catalog, or
+        one whose version has changed, rebuilds the views. Building a view
+        changes the inventory, so call this with the character lock held.
+        """
+        if view not in INVENTORY_VIEWS:
+            raise ValueError(f"Unknown inventory view: {view}")
+
+        catalog_version = getattr(item_data_dict, "version", None)
+        if self._catalog is not item_data_dict or self._catalog_version != catalog_version:
+            self._catalog = item_data_dict
+            self._catalog_version = catalog_version
+            self._views = {}
+            self._view_keys = {}
+
+        keys = self._views.get(view)
+        if keys is None:
+            inserted = {item_id: self._view_key(view, item_id) for item_id in self._counts}
+            keys = sorted(inserted.values())
+            self._views[view] = keys
+            self._view_keys[view] = inserted
+
+        return [(key[-1], self._counts[key[-1]]) for key in keys]
+
+    def clear(self):
+        self._counts.clear()
+        self._size = 0
+        self._stacks = 0
+        self._version += 1
+        self._render.clear()
+        for keys in self._views.values():
+            keys.clear()
+        for inserted in self._view_keys.values():
+            inserted.clear()
+
+    def copy(self):
+        duplicate = Inventory()
+        duplicate._counts = dict(self._counts)
+        duplicate._limits = dict(self._limits)
+        duplicate._size = self._size
+        duplicate._stacks = self._stacks
+        duplicate._views = {view: list(keys) for view, keys in self._views.items()}
+        duplicate._view_keys = {view: dict(keys) for view, keys in self._view_keys.items()}
+        duplicate._catalog = self._catalog
+        duplicate._catalog_version = self._catalog_version
+        duplicate._version = self._version
+        return duplicate
+
+    def __contains__(self, item_id):
+        return item_id in self._counts
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for item_id, quantity in self._counts.items():
+            for _ in range(quantity):
+                yield item_id
+
+    def __eq__(self, other):
+        # Equal to any inventory or list holding the same quantities
+        if not isinstance(other, Inventory):
+            if not isinstance(other, (list, tuple)):
+                return NotImplemented
+            other = Inventory(other)
+        return self._counts == other._counts
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
+
+
+def get_inventory(character):
+    """
+    Return the character's inventory as an Inventory
+
+    Characters created or loaded by character_manager hold a plain list;
+    it is converted in place, under the character lock, the first time
+    inventory_system touches it. Stack sizes loaded from the save (the
+    "stack_limits" field) move onto the Inventory then.
+    """
+    inventory = character["inventory"]
+
+    # Inside a transaction the field is a snapshot wrapper; keep using it
+    if not isinstance(current_value(inventory), Inventory):
+        with character_lock(character):
+            inventory = character["inventory"]
+            if not isinstance(current_value(inventory), Inventory):
+                inventory = Inventory(inventory)
+                limits = current_value(character.pop("stack_limits", None)) or {}
+                for item_id, max_stack in limits.items():
+                    inventory.set_stack_limit(item_id, max_stack)
+                character["inventory"] = inventory
+
+    return inventory
+
+
+def apply_stack_limits(character, item_data_dict):
+    """
+    Set stack sizes for every held item from item data
+
+    Saves keep the stack sizes in use when they were written; call this
+    after loading to pick up any changes to the item data since.
+    """
+    inventory = get_inventory(character)
+
+    for item_id, _ in list(inventory.items()):
+        if item_id in item_data_dict:
+            inventory.set_stack_limit(item_id, item_data_dict[item_id].get("max_stack", 1))
+
+
+def get_inventory_capacity(character):
+    """Return how many stacks the character's inventory can hold"""
+    return character.get("inventory_capacity", MAX_INVENTORY_SIZE)
+
+
+@synchronized
+def set_inventory_capacity(character, capacity):
+    """
+    Change how many stacks the character's inventory can hold
+    
+    Returns: The new capacity
+    Raises:
+        ValueError if capacity is outside 1..MAX_INVENTORY_CAPACITY
+        InventoryFullError if more stacks than that are already held
+    """
+    if not 1 <= capacity <= MAX_INVENTORY_CAPACITY:
+        raise ValueError(f"Inventory capacity must be 1-{MAX_INVENTORY_CAPACITY}")
+
+    if get_inventory(character).stack_count > capacity:
+        raise InventoryFullError("Too many items held to shrink the inventory.")
+
+    character["inventory_capacity"] = capacity
+    return capacity
 
 # ============================================================================
 # INVENTORY MANAGEMENT
 # ============================================================================
 
-def add_item_to_inventory(character, item_id):
+def _check_quantity(quantity):
+    """Raise ValueError unless quantity is at least one unit"""
+    if quantity < 1:
+        raise ValueError(f"Quantity must be at least 1, not {quantity}")
+
+def _check_space(character, inventory, item_id, quantity, max_stack=None):
+    """Raise InventoryFullError if quantity units would not fit"""
+    needed = inventory.stacks_needed(item_id, quantity, max_stack)
+    if inventory.stack_count + needed > get_inventory_capacity(character):
+        raise InventoryFullError("Inventory is full.")
+
+def _check_held(inventory, item_id, quantity, message):
+    """Raise if fewer than quantity units of item_id are held"""
+    if item_id not in inventory:
+        raise ItemNotFoundError(message)
+
+    if inventory.count(item_id) < quantity:
+        raise InsufficientResourcesError(
+            f"Only {inventory.count(item_id)} {item_id} in inventory."
+        )
+
+@synchronized
+def add_item_to_inventory(character, item_id, quantity=1, max_stack=None):
     """
     Add an item to character's inventory
     
     Args:
         character: Character dictionary
         item_id: Unique item identifier
+        quantity: Number of units to add
+        max_stack: Units per inventory slot (keeps the known size if None)
     
     Returns: True if added successfully
-    Raises: InventoryFullError if inventory is at max capacity
+    Raises:
+        ValueError if quantity is less than 1
+        InventoryFullError if the items need more slots than are free
     """
     # TODO: Implement adding items
-    # Check if inventory is full (>= MAX_INVENTORY_SIZE)
+    # Check if inventory is full (capacity from get_inventory_capacity)
     # Add item_id to character['inventory'] list
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full.")
+    _check_quantity(quantity)
+    inventory = get_inventory(character)
+
+    _check_space(character, inventory, item_id, quantity, max_stack)
 
-    character["inventory"].append(item_id)
+    inventory.add(item_id, quantity, max_stack)
     return True
     pass
 
-def remove_item_from_inventory(character, item_id):
+@synchronized
+def remove_item_from_inventory(character, item_id, quantity=1):
     """
     Remove an item from character's inventory
     
     Args:
         character: Character dictionary
         item_id: Item to remove
+        quantity: Number of units to remove
     
     Returns: True if removed successfully
-    Raises: ItemNotFoundError if item not in inventory
+    Raises:
+        ValueError if quantity is less than 1
+        ItemNotFoundError if item not in inventory
+        InsufficientResourcesError if fewer than quantity units are held
     """
     # TODO: Implement item removal
     # Check if item exists in inventory
     # Remove item from list
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError(f"{item_id} not found in inventory.")
+    _check_quantity(quantity)
+    inventory = get_inventory(character)
 
-    character["inventory"].remove(item_id)
+    _check_held(inventory, item_id, quantity, f"{item_id} not found in inventory.")
+
+    inventory.remove(item_id, quantity)
     return True
     pass
 
+@synchronized
 def has_item(character, item_id):
     """
     Check if character has a specific item
@@ -74,9 +425,10 @@ def has_item(character, item_id):
     Returns: True if item in inventory, False otherwise
     """
     # TODO: Implement item check
-    return item_id in character["inventory"]
+    return item_id in get_inventory(character)
     pass
 
+@synchronized
 def count_item(character, item_id):
     """
     Count how many of a specific item the character has
@@ -84,20 +436,22 @@ def count_item(character, item_id):
     Returns: Integer count of item
     """
     # TODO: Implement item counting
-    # Use list.count() method
-    return character["inventory"].count(item_id)
+    # Inventory.count() is a dictionary lookup
+    return get_inventory(character).count(item_id)
     pass
 
+@synchronized
 def get_inventory_space_remaining(character):
     """
-    Calculate how many more items can fit in inventory
+    Calculate how many more stacks can fit in inventory
     
     Returns: Integer representing available slots
     """
     # TODO: Implement space calculation
-    return MAX_INVENTORY_SIZE - len(character["inventory"])
+    return get_inventory_capacity(character) - get_inventory(character).stack_count
     pass
 
+@synchronized
 def clear_inventory(character):
     """
     Remove all items from inventory
@@ -107,8 +461,9 @@ def clear_inventory(character):
     # TODO: Implement inventory clearing
     # Save current inventory before clearing
     # Clear character's inventory list
-    removed_items = character["inventory"].copy()
-    character["inventory"].clear()
+    inventory = get_inventory(character)
+    removed_items = list(inventory)
+    inventory.clear()
     return removed_items
     pass
 
@@ -116,7 +471,8 @@ def clear_inventory(character):
 # ITEM USAGE
 # ============================================================================
 
-def use_item(character, item_id, item_data):
+@synchronized
+def use_item(character, item_id, item_data, scheduler=None):
     """
     Use a consumable item from inventory
     
@@ -124,9 +480,13 @@ def use_item(character, item_id, item_data):
         character: Character dictionary
         item_id: Item to use
         item_data: Item information dictionary from game_data
+        scheduler: EffectScheduler for timed items (default: the
+                   character's own, see get_effect_scheduler)
     
     Item types and effects:
     - consumable: Apply effect and remove from inventory
+    - consumable with 'duration': stat boosts wear off after that many ticks
+      (health is still restored immediately)
     - weapon/armor: Cannot be "used", only equipped
     
     Returns: String describing what happened
@@ -140,32 +500,159 @@ def use_item(character, item_id, item_data):
     # Parse effect (format: "stat_name:value" e.g., "health:20")
     # Apply effect to character
     # Remove item from inventory
-    if item_id not in character["inventory"]:
+    inventory = get_inventory(character)
+
+    if item_id not in inventory:
         raise ItemNotFoundError(f"{item_id} not in inventory")
         
     if item_data["type"] != "consumable":
         raise InvalidItemTypeError("Item is not consumable")
         
-    stat, value = item_data["effect"].split(":")
-    stat = stat.strip()
-    value = int(value.strip())
-
-    # Apply effect
-    if stat == "health":
-        # Use your existing heal_character to avoid exceeding max_health
-        heal_character(character, value)
-    else:
-        character[stat] += value
+    effects = get_item_effects(item_data)
+    duration = item_data.get("duration")
+
+    # Apply effects
+    timed = {}
+    for stat, value in effects.items():
+        if stat == "health":
+            # Use your existing heal_character to avoid exceeding max_health
+            heal_character(character, value)
+        elif duration:
+            timed[stat] = value
+        else:
+            character[stat] += value
+
+    if timed:
+        scheduler = get_effect_scheduler(character) if scheduler is None else scheduler
+        scheduler.apply(character, timed, duration)
  
     # Remove from inventory after use
-    character["inventory"].remove(item_id)
+    inventory.remove(item_id)
 
 
     # Get item name if present, otherwise use item_id
     item_name = item_data.get("name", item_id)
-    return f"Used {item_name} and gained {value} {stat}."
+    gained = ", ".join(f"{value} {stat}" for stat, value in effects.items())
+    if timed:
+        return f"Used {item_name} and gained {gained} for {duration} turns."
+    return f"Used {item_name} and gained {gained}."
     pass
 
+def _sync_equipment_modifier(character, slot):
+    """
+    Record an equipped item's bonus as a stat modifier if it isn't one yet
+
+    Covers equipment set before stat modifiers existed, whose bonus is
+    already included in the character's stats.
+    """
+    item_id = character.get(f"equipped_{slot}")
+    modifiers = character.get("stat_modifiers", {})
+
+    if item_id is not None and slot not in modifiers:
+        effects = parse_effect_string(character[f"{slot}_effect"])
+        set_stat_modifier(character, slot, effects, already_applied=True)
+
+def get_equipped_items(character):
+    """
+    Get every occupied equipment slot
+    
+    Returns: Dictionary {slot: item_id}
+    """
+    return {
+        slot: character[f"equipped_{slot}"]
+        for slots in EQUIPMENT_SLOTS.values()
+        for slot in slots
+        if character.get(f"equipped_{slot}") is not None
+    }
+
+@synchronized
+def equip_item(character, item_id, item_data, slot=None):
+    """
+    Equip any equippable item into its slot
+    
+    Args:
+        character: Character dictionary
+        item_id: Item to equip
+        item_data: Item information dictionary
+        slot: Slot to use; defaults to the first free slot for the item type,
+              or the first slot if all are taken
+    
+    The slot's equipment is stored as character["equipped_<slot>"] and
+    character["<slot>_effect"], and its bonus as the "<slot>" stat modifier.
+    An item already in the slot goes back to the inventory.
+    
+    Returns: String describing equipment change
+    Raises:
+        ItemNotFoundError if item not in inventory
+        InvalidItemTypeError if the item can't be equipped in that slot
+        InventoryFullError if the replaced item has no room in inventory
+    """
+    if item_id not in get_inventory(character):
+        raise ItemNotFoundError(f"{item_id} not in inventory.")
+
+    slots = EQUIPMENT_SLOTS.get(item_data["type"])
+    if slots is None:
+        raise InvalidItemTypeError(f"{item_data['type']} items can't be equipped.")
+
+    if slot is None:
+        free = [s for s in slots if character.get(f"equipped_{s}") is None]
+        slot = free[0] if free else slots[0]
+    elif slot not in slots:
+        raise InvalidItemTypeError(f"{item_data['type']} can't go in the {slot} slot.")
+
+    effects = get_item_effects(item_data)
+
+    # Roll back the stat changes if the swap fails part way
+    with character_transaction(character):
+        _sync_equipment_modifier(character, slot)
+
+        old_item = character.get(f"equipped_{slot}")
+        if old_item is not None:
+            if character["inventory"].stack_count >= get_inventory_capacity(character):
+                raise InventoryFullError(f"No space to unequip current {slot.replace('_', ' ')}.")
+
+            character["inventory"].append(old_item)
+
+        # Replacing the slot's modifier removes the old bonus and adds the new
+        # one; it also keeps current health within a lowered max_health
+        set_stat_modifier(character, slot, effects)
+
+        character[f"equipped_{slot}"] = item_id
+        character[f"{slot}_effect"] = item_data["effect"]
+
+        character["inventory"].remove(item_id)
+
+    item_name = item_data.get("name", item_id)
+    return f"Equipped {slot.replace('_', ' ')}: {item_name} ({format_item_effects(effects)})."
+
+@synchronized
+def unequip_item(character, slot):
+    """
+    Remove the item in an equipment slot and return it to inventory
+    
+    Returns: Item ID that was unequipped, or None if the slot is empty
+    Raises: InventoryFullError if inventory is full
+    """
+    item_id = character.get(f"equipped_{slot}")
+    if item_id is None:
+        return None
+
+    inventory = get_inventory(character)
+
+    if inventory.stack_count >= get_inventory_capacity(character):
+        raise InventoryFullError(f"Not enough space to unequip {slot.replace('_', ' ')}.")
+
+    # Remove bonuses (also adjusts health if max_health drops)
+    _sync_equipment_modifier(character, slot)
+    clear_stat_modifier(character, slot)
+
+    inventory.append(item_id)
+
+    character[f"equipped_{slot}"] = None
+    character[f"{slot}_effect"] = None
+
+    return item_id
+
 def equip_weapon(character, item_id, item_data):
     """
     Equip a weapon
@@ -186,41 +673,13 @@ def equip_weapon(character, item_id, item_data):
         ItemNotFoundError if item not in inventory
         InvalidItemTypeError if item type is not 'weapon'
     """
-    # TODO: Implement weapon equipping
-    # Check item exists and is type 'weapon'
-    # Handle unequipping current weapon if exists
-    # Parse effect and apply to character stats
-    # Store equipped_weapon in character dictionary
-    # Remove item from inventory
-    if item_id not in character["inventory"]:
+    if item_id not in get_inventory(character):
         raise ItemNotFoundError(f"{item_id} not in inventory.")
 
     if item_data["type"] != "weapon":
         raise InvalidItemTypeError("Item is not a weapon.")
 
-    # Unequip old weapon
-    if "equipped_weapon" in character and character["equipped_weapon"] is not None:
-        old_weapon = character["equipped_weapon"]
-        old_stat, old_val = parse_item_effect(character["weapon_effect"])
-        character[old_stat] -= old_val
-
-        if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-            raise InventoryFullError("No space to unequip current weapon.")
-
-        character["inventory"].append(old_weapon)
-
-    # Equip new weapon
-    stat, value = parse_item_effect(item_data["effect"])
-    character[stat] += value
-
-    character["equipped_weapon"] = item_id
-    character["weapon_effect"] = item_data["effect"]
-
-    character["inventory"].remove(item_id)
-
-    item_name = item_data.get("name", item_id)
-    return f"Equipped weapon: {item_name} (+{value} {stat})."
-    pass
+    return equip_item(character, item_id, item_data, "weapon")
 
 def equip_armor(character, item_id, item_data):
     """
@@ -242,40 +701,13 @@ def equip_armor(character, item_id, item_data):
         ItemNotFoundError if item not in inventory
         InvalidItemTypeError if item type is not 'armor'
     """
-    # TODO: Implement armor equipping
-    # Similar to equip_weapon but for armor
-    if item_id not in character["inventory"]:
+    if item_id not in get_inventory(character):
         raise ItemNotFoundError(f"{item_id} not found in inventory.")
 
     if item_data["type"] != "armor":
         raise InvalidItemTypeError("Item is not armor.")
 
-    # Unequip previous armor
-    if "equipped_armor" in character and character["equipped_armor"] is not None:
-        old_armor = character["equipped_armor"]
-        old_stat, old_val = parse_item_effect(character["armor_effect"])
-        character[old_stat] -= old_val
-
-        if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-            raise InventoryFullError("No space to unequip current armor.")
-
-        character["inventory"].append(old_armor)
-
-    # Equip new armor
-    stat, value = parse_item_effect(item_data["effect"])
-    character[stat] += value
-
-    # If max_health changes, ensure current health isn't above new max
-    if stat == "max_health" and character["health"] > character["max_health"]:
-        character["health"] = character["max_health"]
-
-    character["equipped_armor"] = item_id
-    character["armor_effect"] = item_data["effect"]
-
-    character["inventory"].remove(item_id)
-
-    return f"Equipped armor: {item_data['name']} (+{value} {stat})."
-    pass
+    return equip_item(character, item_id, item_data, "armor")
 
 def unequip_weapon(character):
     """
@@ -284,33 +716,7 @@ def unequip_weapon(character):
     Returns: Item ID that was unequipped, or None if no weapon equipped
     Raises: InventoryFullError if inventory is full
     """
-    # TODO: Implement weapon unequipping
-    # Check if weapon is equipped
-    # Remove stat bonuses
-    # Add weapon back to inventory
-    # Clear equipped_weapon from character
-    
-    if "equipped_weapon" not in character or character["equipped_weapon"] is None:
-        return None  # No weapon to unequip
-
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Not enough space to unequip weapon.")
-
-    item_id = character["equipped_weapon"]
-    stat, value = parse_item_effect(character["weapon_effect"])
-
-    # Remove bonuses
-    character[stat] -= value
-
-    # Add weapon back to inventory
-    character["inventory"].append(item_id)
-
-    # Clear equipped fields
-    character["equipped_weapon"] = None
-    character["weapon_effect"] = None
-
-    return item_id
-    pass
+    return unequip_item(character, "weapon")
 
 def unequip_armor(character):
     """
@@ -319,45 +725,104 @@ def unequip_armor(character):
     Returns: Item ID that was unequipped, or None if no armor equipped
     Raises: InventoryFullError if inventory is full
     """
-    # TODO: Implement armor unequipping
-    if "equipped_armor" not in character or character["equipped_armor"] is None:
-        return None
-
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Not enough space to unequip armor.")
-
-    item_id = character["equipped_armor"]
-    stat, value = parse_item_effect(character["armor_effect"])
-
-    character[stat] -= value
-
-    # Adjust health if needed
-    if stat == "max_health" and character["health"] > character["max_health"]:
-        character["health"] = character["max_health"]
-
-    character["inventory"].append(item_id)
-
-    character["equipped_armor"] = None
-    character["armor_effect"] = None
-
-    return item_id
-    pass
+    return unequip_item(character, "armor")
 
 # ============================================================================
 # SHOP SYSTEM
 # ============================================================================
 
-def purchase_item(character, item_id, item_data):
+class ShopPricing:
+    """
+    Shop buy/sell prices that follow supply and demand
+
+    Purchases and sales only add to per-item volume counters. Every
+    interval seconds the whole catalog is repriced in one batch (with
+    NumPy when it's installed): more buying than selling raises an item's
+    price, more selling lowers it, by at most PRICE_SENSITIVITY of its
+    base cost. Old volume decays each batch so prices drift back.
+    Lookups between batches just read the precomputed price lists.
+    """
+
+    def __init__(self, item_data_dict, interval=PRICE_UPDATE_INTERVAL, clock=time.monotonic):
+        self.item_ids = list(item_data_dict)
+        self.index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.interval = interval
+        self.clock = clock
+
+        base = [item_data_dict[item_id]["cost"] for item_id in self.item_ids]
+        zeros = [0.0] * len(base)
+        if numpy is not None:
+            self.base = numpy.array(base, dtype=float)
+            self.bought = numpy.array(zeros)
+            self.sold = numpy.array(zeros)
+        else:
+            self.base, self.bought, self.sold = base, zeros, list(zeros)
+
+        self.recompute()
+
+    def _position(self, item_id):
+        if item_id not in self.index:
+            raise ItemNotFoundError(f"{item_id} is not sold here.")
+        return self.index[item_id]
+
+    def record_purchase(self, item_id, quantity=1):
+        """Count quantity units bought toward the next recompute"""
+        self.bought[self._position(item_id)] += quantity
+
+    def record_sale(self, item_id, quantity=1):
+        """Count quantity units sold toward the next recompute"""
+        self.sold[self._position(item_id)] += quantity
+
+    def recompute(self):
+        """Reprice every item from the recorded volumes"""
+        if numpy is not None:
+            pressure = (self.bought - self.sold) / (self.bought + self.sold + PRICE_DAMPING)
+            buy = numpy.maximum(1, numpy.rint(self.base * (1 + PRICE_SENSITIVITY * pressure)))
+            buy_prices = buy.astype(int).tolist()
+            self.bought *= PRICE_VOLUME_DECAY
+            self.sold *= PRICE_VOLUME_DECAY
+        else:
+            buy_prices = [
+                max(1, round(base * (1 + PRICE_SENSITIVITY * (b - s) / (b + s + PRICE_DAMPING))))
+                for base, b, s in zip(self.base, self.bought, self.sold)
+            ]
+            self.bought = [b * PRICE_VOLUME_DECAY for b in self.bought]
+            self.sold = [s * PRICE_VOLUME_DECAY for s in self.sold]
+
+        self.buy_prices = buy_prices
+        self.sell_prices = [price // 2 for price in buy_prices]
+        self.updated = self.clock()
+
+    def refresh(self):
+        """Recompute prices if the update interval has passed"""
+        if self.clock() - self.updated >= self.interval:
+            self.recompute()
+
+    def buy_price(self, item_id):
+        """Current price to buy one unit of item_id"""
+        self.refresh()
+        return self.buy_prices[self._position(item_id)]
+
+    def sell_price(self, item_id):
+        """Current gold paid for selling one unit of item_id"""
+        self.refresh()
+        return self.sell_prices[self._position(item_id)]
+
+@synchronized
+def purchase_item(character, item_id, item_data, quantity=1, pricing=None):
     """
     Purchase an item from a shop
     
     Args:
         character: Character dictionary
         item_id: Item to purchase
-        item_data: Item information with 'cost' field
+        item_data: Item information with 'cost' (and optional 'max_stack') field
+        quantity: Number of units to buy
+        pricing: ShopPricing to charge current prices (default: item cost)
     
     Returns: True if purchased successfully
     Raises:
+        ValueError if quantity is less than 1
         InsufficientResourcesError if not enough gold
         InventoryFullError if inventory is full
     """
@@ -366,68 +831,230 @@ def purchase_item(character, item_id, item_data):
     # Check if inventory has space
     # Subtract gold from character
     # Add item to inventory
-    cost = item_data["cost"]
+    _check_quantity(quantity)
+    unit_cost = item_data["cost"] if pricing is None else pricing.buy_price(item_id)
+    cost = unit_cost * quantity
+    max_stack = item_data.get("max_stack", 1)
 
     if character["gold"] < cost:
         raise InsufficientResourcesError("Not enough gold.")
 
-    if len(character["inventory"]) >= MAX_INVENTORY_SIZE:
-        raise InventoryFullError("Inventory is full.")
+    inventory = get_inventory(character)
+
+    _check_space(character, inventory, item_id, quantity, max_stack)
 
     character["gold"] -= cost
-    character["inventory"].append(item_id)
+    inventory.add(item_id, quantity, max_stack)
+
+    if pricing is not None:
+        pricing.record_purchase(item_id, quantity)
+
+    publish_event(character, "buy", item_id, quantity, _item_tags(item_data))
 
     return True
     pass
 
-def sell_item(character, item_id, item_data):
+@synchronized
+def sell_item(character, item_id, item_data, quantity=1, pricing=None):
     """
-    Sell an item for half its purchase cost
+    Sell an item for half its purchase cost (or the current sell price)
     
     Args:
         character: Character dictionary
         item_id: Item to sell
         item_data: Item information with 'cost' field
+        quantity: Number of units to sell
+        pricing: ShopPricing to pay current prices (default: cost // 2)
     
     Returns: Amount of gold received
-    Raises: ItemNotFoundError if item not in inventory
+    Raises:
+        ValueError if quantity is less than 1
+        ItemNotFoundError if item not in inventory
+        InsufficientResourcesError if fewer than quantity units are held
     """
     # TODO: Implement selling
     # Check if character has item
     # Calculate sell price (cost // 2)
     # Remove item from inventory
     # Add gold to character
-    if item_id not in character["inventory"]:
-        raise ItemNotFoundError("Cannot sell item not in inventory.")
+    _check_quantity(quantity)
+    inventory = get_inventory(character)
+
+    _check_held(inventory, item_id, quantity, "Cannot sell item not in inventory.")
 
-    sell_price = item_data["cost"] // 2
+    unit_price = item_data["cost"] // 2 if pricing is None else pricing.sell_price(item_id)
+    sell_price = unit_price * quantity
 
-    character["inventory"].remove(item_id)
+    inventory.remove(item_id, quantity)
     character["gold"] += sell_price
 
+    if pricing is not None:
+        pricing.record_sale(item_id, quantity)
+
     return sell_price
     pass
 
+@synchronized
+def sell_junk(character, item_data_dict, max_cost, pricing=None):
+    """
+    Sell every unit of every held item costing max_cost or less
+    
+    Walks the inventory's value view from the cheapest item up, so it
+    stops at the first item worth more than max_cost.
+    
+    Returns: Total gold received
+    """
+    inventory = get_inventory(character)
+    junk = []
+
+    for item_id, quantity in inventory.sorted_items("value", item_data_dict):
+        if item_id not in item_data_dict:
+            continue
+        if item_data_dict[item_id]["cost"] > max_cost:
+            break
+        junk.append((item_id, quantity))
+
+    return sum(
+        sell_item(character, item_id, item_data_dict[item_id], quantity, pricing)
+        for item_id, quantity in junk
+    )
+
+class ShopCart:
+    """
+    A bulk shop order: items to buy and items to sell
+
+    Lines for the same item are merged. Pass the cart to checkout_cart()
+    to apply the whole order at once.
+    """
+
+    def __init__(self):
+        self.purchases = {}
+        self.sales = {}
+
+    def buy(self, item_id, quantity=1):
+        """Add quantity units of item_id to the purchase list"""
+        _check_quantity(quantity)
+        self.purchases[item_id] = self.purchases.get(item_id, 0) + quantity
+        return self
+
+    def sell(self, item_id, quantity=1):
+        """Add quantity units of item_id to the sale list"""
+        _check_quantity(quantity)
+        self.sales[item_id] = self.sales.get(item_id, 0) + quantity
+        return self
+
+    def __len__(self):
+        return len(self.purchases) + len(self.sales)
+
+@synchronized
+def checkout_cart(character, cart, item_data_dict, pricing=None):
+    """
+    Apply every purchase and sale in a cart, or none of them
+    
+    The whole order is validated in one pass first: every item must exist,
+    sold items must be held, gold (after sale proceeds) must cover the
+    purchases, and the final inventory must fit. Sales are applied before
+    purchases and gold is updated once.
+    
+    With pricing (a ShopPricing), lines are charged at its current prices
+    and the trades are recorded; otherwise item cost and cost // 2 are used.
+    
+    Returns: Dictionary with 'spent', 'earned' and remaining 'gold'
+    Raises:
+        ValueError if a line's quantity is less than 1
+        ItemNotFoundError if an item is unknown or a sold item is not held
+        InsufficientResourcesError if gold or held quantities are too low
+        InventoryFullError if the resulting inventory would not fit
+    """
+    inventory = get_inventory(character)
+
+    for item_id, quantity in list(cart.purchases.items()) + list(cart.sales.items()):
+        _check_quantity(quantity)
+        if item_id not in item_data_dict:
+            raise ItemNotFoundError(f"Unknown item: {item_id}")
+
+    for item_id, quantity in cart.sales.items():
+        _check_held(inventory, item_id, quantity, f"Cannot sell {item_id}: not in inventory.")
+
+    if pricing is None:
+        spent = sum(item_data_dict[i]["cost"] * q for i, q in cart.purchases.items())
+        earned = sum(item_data_dict[i]["cost"] // 2 * q for i, q in cart.sales.items())
+    else:
+        spent = sum(pricing.buy_price(i) * q for i, q in cart.purchases.items())
+        earned = sum(pricing.sell_price(i) * q for i, q in cart.sales.items())
+
+    if character["gold"] + earned < spent:
+        raise InsufficientResourcesError("Not enough gold.")
+
+    # Net stack change across every item the order touches
+    extra_stacks = 0
+    for item_id in set(cart.purchases) | set(cart.sales):
+        change = cart.purchases.get(item_id, 0) - cart.sales.get(item_id, 0)
+        max_stack = item_data_dict[item_id].get("max_stack", 1) if item_id in cart.purchases else None
+        extra_stacks += inventory.stacks_needed(item_id, change, max_stack)
+
+    if inventory.stack_count + extra_stacks > get_inventory_capacity(character):
+        raise InventoryFullError("Not enough inventory space for this order.")
+
+    for item_id, quantity in cart.sales.items():
+        inventory.remove(item_id, quantity)
+
+    for item_id, quantity in cart.purchases.items():
+        inventory.add(item_id, quantity, item_data_dict[item_id].get("max_stack", 1))
+
+    character["gold"] += earned - spent
+
+    if pricing is not None:
+        for item_id, quantity in cart.sales.items():
+            pricing.record_sale(item_id, quantity)
+        for item_id, quantity in cart.purchases.items():
+            pricing.record_purchase(item_id, quantity)
+
+    for item_id, quantity in cart.purchases.items():
+        publish_event(character, "buy", item_id, quantity, _item_tags(item_data_dict[item_id]))
+
+    return {"spent": spent, "earned": earned, "gold": character["gold"]}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
+def _item_tags(item_data):
+    """Extra names an item matches in quest objectives (its type)"""
+    return (item_data["type"],) if "type" in item_data else ()
+
 def parse_item_effect(effect_string):
     """
-    Parse item effect string into stat name and value
+    Parse item effect string into stat changes
     
     Args:
-        effect_string: String in format "stat_name:value"
+        effect_string: One or more "stat_name:value" pairs separated by commas
     
-    Returns: Tuple of (stat_name, value)
-    #Example: "health:20"  ("health", 20)
+    Returns: Dictionary {stat_name: value}
+    #Example: "strength:12,magic:-3"  {"strength": 12, "magic": -3}
+    Raises: InvalidDataFormatError if a pair is malformed
     """
-    # TODO: Implement effect parsing
-    # Split on ":"
-    # Convert value to integer
-    stat, val = effect_string.split(":")
-    return stat.strip(), int(val.strip())
-    pass
+    # Same parser game_data uses for item files
+    return parse_effect_string(effect_string)
+
+def get_item_effects(item_data):
+    """
+    Get an item's effects as a dictionary {stat_name: value}
+    
+    Items loaded by game_data carry effects compiled at load time; for other
+    item dictionaries the effect string is compiled once and cached on it.
+    """
+    effects = item_data.get("effects")
+
+    if effects is None:
+        effects = parse_effect_string(item_data["effect"])
+        item_data["effects"] = effects
+
+    return effects
+
+def format_item_effects(effects):
+    """Format effects for display, e.g. "+12 strength, -3 magic" """
+    return ", ".join(f"{value:+d} {stat}" for stat, value in effects.items())
 
 def apply_stat_effect(character, stat_name, value):
     """
@@ -450,31 +1077,76 @@ def apply_stat_effect(character, stat_name, value):
             character["health"] = character["max_health"]
     pass
 
-def display_inventory(character, item_data_dict):
+def _format_inventory_line(item_id, quantity, item_data_dict):
+    """Format one display_inventory line"""
+    data = item_data_dict.get(item_id, {"name": item_id, "type": "unknown"})
+    return f"{data['name']} ({data['type']}) x{quantity}"
+
+@synchronized
+def display_inventory(character, item_data_dict, sort_by="type"):
     
     #Display character's inventory in formatted way
     
     # Args:
        # character: Character dictionary
        # item_data_dict: Dictionary of all item data
+       # sort_by: "type", "name" or "value"
     
     #Shows item names, types, and quantities
     
-    # TODO: Implement inventory display
-    # Count items (some may appear multiple times)
-    # Display with item names from item_data_dict
+    # The text is cached on the inventory per (inventory version, catalog
+    # version). When the inventory changed, only lines for item ids whose
+    # quantity changed are formatted again. Catalogs without a version
+    # (plain dicts) are rendered from scratch every time.
+    inventory = get_inventory(character)
+    cache = inventory._render
+    catalog_version = getattr(item_data_dict, "version", None)
+    catalog = (id(item_data_dict), catalog_version)
+    key = (inventory.version, catalog, sort_by)
+
+    if catalog_version is not None and cache.get("key") == key:
+        return cache["text"]
+
+    lines = {}
+    if catalog_version is not None and cache.get("catalog") == catalog:
+        lines = cache["lines"]
+        for item_id in inventory._changed:
+            lines.pop(item_id, None)
+
     output = ["=== INVENTORY ==="]
 
-    counted = {}
-    for item in character["inventory"]:
-        counted[item] = counted.get(item, 0) + 1
+    # Quantities and sort order are already kept by the Inventory
+    for item_id, qty in inventory.sorted_items(sort_by, item_data_dict):
+        line = lines.get(item_id)
+        if line is None:
+            line = _format_inventory_line(item_id, qty, item_data_dict)
+            lines[item_id] = line
+        output.append(line)
+
+    text = "\n".join(output)
+
+    if catalog_version is not None:
+        inventory._changed.clear()
+        cache.update(key=key, catalog=catalog, lines=lines, text=text)
 
-    for item_id, qty in counted.items():
-        data = item_data_dict.get(item_id, {"name": item_id, "type": "unknown"})
-        output.append(f"{data['name']} ({data['type']}) x{qty}")
+    return text
+
+def display_shop(item_data_dict, pricing=None):
+    """
+    Format the shop's items with their current buy and sell prices
+    
+    Returns: String listing one item per line
+    """
+    output = ["=== SHOP ==="]
+
+    for item_id, data in item_data_dict.items():
+        if pricing is None:
+            buy, sell = data["cost"], data["cost"] // 2
+        else:
+            buy, sell = pricing.buy_price(item_id), pricing.sell_price(item_id)
+        output.append(f"{item_id}: {data['name']} - buy {buy}g / sell {sell}g")
 
     return "\n".join(output)
-    pass
 
 # ============================================================================
 # TESTING
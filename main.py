@@ -15,6 +15,7 @@ import character_manager
 import inventory_system
 import quest_handler
 import combat_system
+import crafting_system
 import game_data
 from custom_exceptions import *
 
@@ -26,6 +27,9 @@ from custom_exceptions import *
 current_character = None
 all_quests = {}
 all_items = {}
+all_loot_tables = {}
+all_recipes = {}
+shop_pricing = None
 game_running = False
 
 # ============================================================================
@@ -105,15 +109,16 @@ def load_game():
     global current_character
     
     print("\n=== LOAD GAME ===")
-    saves = character_manager.list_saved_characters()
+    # Header-only loads: the menu needs just name, class and level
+    saves = list(character_manager.load_character_headers())
 
     if not saves:
         print("No saved games found.")
         return
 
     print("\nSaved Characters:")
-    for i, name in enumerate(saves, 1):
-        print(f"{i}. {name}")
+    for i, save in enumerate(saves, 1):
+        print(f"{i}. {save['name']} - Level {save['level']} {save['class']}")
 
     while True:
         try:
@@ -125,11 +130,15 @@ def load_game():
         print("Invalid input.")
 
     try:
-        current_character = character_manager.load_character(saves[choice - 1])
+        current_character = character_manager.load_character(saves[choice - 1]['name'])
+        # Stack sizes are saved, but the item data may have changed since
+        inventory_system.apply_stack_limits(current_character, all_items)
+        # Objective progress isn't saved; start tracking active quests again
+        quest_handler.track_active_quests(current_character, all_quests)
         print("\nGame loaded successfully!")
         game_loop()
 
-    except (CharacterNotFoundError, SaveFileCorruptedError) as e:
+    except (CharacterNotFoundError, SaveFileCorruptedError, InvalidSaveDataError) as e:
         print(f"Error loading game: {e}")
     pass
 
@@ -213,40 +222,54 @@ def view_inventory():
     """Display and manage inventory"""
     global current_character, all_items
     
-    print("\n=== INVENTORY ===")
-    inventory_system.display_inventory(current_character)
+    print()
+    print(inventory_system.display_inventory(current_character, all_items))
 
     print("\nOptions:")
     print("1. Use Item")
     print("2. Equip Item")
     print("3. Drop Item")
-    print("4. Back")
+    print("4. Craft Item")
+    print("5. Back")
 
-    choice = input("Choose (1-4): ").strip()
+    choice = input("Choose (1-5): ").strip()
 
     if choice == "1":
         item = input("Item to use: ").strip()
         try:
-            inventory_system.use_item(current_character, item)
-            print(f"Used {item}!")
+            if item not in all_items:
+                raise ItemNotFoundError(f"Unknown item: {item}")
+            print(inventory_system.use_item(current_character, item, all_items[item]))
         except InventoryError as e:
             print(f"Error: {e}")
 
     elif choice == "2":
         item = input("Item to equip: ").strip()
         try:
-            inventory_system.equip_item(current_character, item)
-            print(f"Equipped {item}!")
+            if item not in all_items:
+                raise ItemNotFoundError(f"Unknown item: {item}")
+            print(inventory_system.equip_item(current_character, item, all_items[item]))
         except InventoryError as e:
             print(f"Error: {e}")
 
     elif choice == "3":
         item = input("Item to drop: ").strip()
         try:
-            inventory_system.drop_item(current_character, item)
+            inventory_system.remove_item_from_inventory(current_character, item)
             print(f"Dropped {item}.")
         except InventoryError as e:
             print(f"Error: {e}")
+
+    elif choice == "4":
+        crafting_system.display_recipes(current_character, all_recipes)
+        item = input("Item to craft: ").strip()
+        amount = input("How many? ").strip()
+        try:
+            crafting_system.craft_item(current_character, item, all_recipes,
+                                       int(amount) if amount.isdigit() else 1, all_items)
+            print(f"Crafted {item}!")
+        except (InventoryError, ValueError) as e:
+            print(f"Error: {e}")
     pass
 
 def quest_menu():
@@ -280,15 +303,19 @@ def quest_menu():
     elif choice == "5":
         quest_name = input("Quest to abandon: ").strip()
         try:
-            quest_handler.abandon_quest(current_character, quest_name)
+            quest_handler.abandon_quest(current_character, quest_name, all_quests)
             print("Quest abandoned.")
         except QuestError as e:
             print(f"Error: {e}")
     elif choice == "6":
         q = input("Quest to force-complete: ").strip()
         try:
+            old_level = current_character["level"]
             quest_handler.complete_quest(current_character, q, all_quests)
             print("Quest completed! (Test Mode)")
+            for message in quest_handler.get_level_up_messages(
+                    all_quests, old_level, current_character["level"]):
+                print(message)
         except QuestError as e:
             print(f"Error: {e}")
 
@@ -303,16 +330,33 @@ def explore():
     enemy = combat_system.get_random_enemy_for_level(level)
 
     print(f"A wild {enemy['name']} appears!")
-    battle = combat_system.SimpleBattle(current_character, enemy)
+    battle = combat_system.SimpleBattle(current_character, enemy, loot_tables=all_loot_tables)
 
     try:
         result = battle.start_battle()
 
         if result["winner"] == "player":
             print("\nYou won the battle!")
-            print(f"Gained {result['xp_gained']} XP and {result['gold_gained']} gold!")
-            character_manager.add_xp(current_character, result["xp_gained"])
-            current_character["gold"] += result["gold_gained"]
+            print(f"Gained {result['xp']} XP and {result['gold']} gold!")
+            character_manager.gain_experience(current_character, result["xp"])
+            character_manager.add_gold(current_character, result["gold"])
+
+            completed = list(result.get("completed_quests", []))
+            drops = result.get("items", {})
+            for item_id, quantity in drops.items():
+                print(f"Found {item_id} x{quantity}!")
+            before = len(current_character["completed_quests"])
+            left_behind = combat_system.award_loot(current_character, drops, all_items)
+            completed += list(current_character["completed_quests"])[before:]
+            if left_behind:
+                print("Your inventory is full; some loot was left behind.")
+
+            for quest_id in completed:
+                print(f"Quest completed: {all_quests[quest_id]['title']}!")
+            # level was read before the battle, so quest rewards count too
+            for message in quest_handler.get_level_up_messages(
+                    all_quests, level, current_character["level"]):
+                print(message)
 
         elif result["winner"] == "enemy":
             print("\nYou have been defeated...")
@@ -325,11 +369,10 @@ def explore():
 
 def shop():
     """Shop menu for buying/selling items"""
-    global current_character, all_items
+    global current_character, all_items, shop_pricing
     
-    print("\n=== SHOP ===")
-    print(f"Your Gold: {current_character['gold']}")
-    game_data.display_shop_items(all_items)
+    print(f"\nYour Gold: {current_character['gold']}")
+    print(inventory_system.display_shop(all_items, shop_pricing))
 
     print("\nOptions:")
     print("1. Buy Item")
@@ -341,16 +384,23 @@ def shop():
     if choice == "1":
         item = input("Item to buy: ").strip()
         try:
-            inventory_system.buy_item(current_character, item, all_items)
+            if item not in all_items:
+                raise ItemNotFoundError(f"The shop doesn't sell {item}.")
+            before = len(current_character["completed_quests"])
+            inventory_system.purchase_item(current_character, item, all_items[item], pricing=shop_pricing)
             print(f"Bought {item}!")
+            for quest_id in list(current_character["completed_quests"])[before:]:
+                print(f"Quest completed: {all_quests[quest_id]['title']}!")
         except InventoryError as e:
             print(f"Error: {e}")
 
     elif choice == "2":
         item = input("Item to sell: ").strip()
         try:
-            inventory_system.sell_item(current_character, item, all_items)
-            print(f"Sold {item}.")
+            if item not in all_items:
+                raise ItemNotFoundError(f"The shop doesn't buy {item}.")
+            gold = inventory_system.sell_item(current_character, item, all_items[item], pricing=shop_pricing)
+            print(f"Sold {item} for {gold} gold.")
         except InventoryError as e:
             print(f"Error: {e}") 
     pass
@@ -372,7 +422,7 @@ def save_game():
 
 def load_game_data():
     """Load all quest and item data from files"""
-    global all_quests, all_items
+    global all_quests, all_items, all_loot_tables, all_recipes, shop_pricing
     
     try:
         all_quests = game_data.load_quests()
@@ -385,6 +435,20 @@ def load_game_data():
     except InvalidDataFormatError as e:
         print(f"Data error: {e}")
         raise
+
+    # Loot tables are optional; without them battles only give XP and gold
+    try:
+        all_loot_tables = game_data.load_loot_tables()
+    except MissingDataFileError:
+        all_loot_tables = {}
+
+    # Recipes are optional too; without them nothing can be crafted
+    try:
+        all_recipes = game_data.load_recipes()
+    except MissingDataFileError:
+        all_recipes = {}
+
+    shop_pricing = inventory_system.ShopPricing(all_items)
     pass
 
 def handle_character_death():
@@ -0,0 +1,295 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Market System Module
+
+A player-to-player marketplace. Each item has an order book where buy and
+sell orders are matched by price, then by arrival time.
+"""
+
+import heapq
+import itertools
+import threading
+
+from character_manager import character_lock
+
+from inventory_system import (
+    add_item_to_inventory,
+    remove_item_from_inventory
+)
+from custom_exceptions import (
+    InventoryFullError,
+    InsufficientResourcesError
+)
+
+# ============================================================================
+# ORDER BOOKS
+# ============================================================================
+
+class Market:
+    """
+    Order books for every item plus the gold and items held in escrow
+
+    Sell orders hand their items to the market when placed and buy limit
+    orders hand over quantity * price gold, so a match can always settle.
+    Buyers who pay less than their limit get the difference back. Items
+    that don't fit in a buyer's inventory wait in pending deliveries until
+    collect() is called. Deliveries are keyed by the character object, not
+    its name, since two characters can share a name; each entry holds the
+    character so its id can't be reused while items wait.
+
+    Books are heaps: bids keyed on (-price, seq), asks on (price, seq).
+    Cancelled orders are left in the heap and skipped when they reach the
+    top.
+
+    One lock covers the books, so orders are matched one at a time; gold
+    and inventory changes also take each character's own lock.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.orders = {}
+        self.pending = {}
+        self.trades = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _book(self, item_id):
+        book = self.books.get(item_id)
+        if book is None:
+            book = {"bids": [], "asks": []}
+            self.books[item_id] = book
+        return book
+
+    def place_order(self, character, side, item_id, quantity, price=None, max_stack=None):
+        """
+        Place a buy or sell order and match it against the book
+
+        Limit orders (with a price) rest in the book until filled or
+        cancelled. Market orders (price=None) take whatever is available
+        and the rest is cancelled.
+
+        Returns: The order dictionary ('status' is open, filled or
+                 cancelled, 'filled' counts units traded so far)
+        Raises:
+            ValueError for a bad side, quantity or price
+            ItemNotFoundError / InsufficientResourcesError if a seller
+                doesn't hold the items
+            InsufficientResourcesError if a limit buyer can't cover the order
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Order side must be buy or sell, not {side}")
+        if quantity < 1 or (price is not None and price < 1):
+            raise ValueError("Order quantity and price must be positive")
+
+        with self._lock:
+            return self._place(character, side, item_id, quantity, price, max_stack)
+
+    def _place(self, character, side, item_id, quantity, price, max_stack):
+        if side == "sell":
+            remove_item_from_inventory(character, item_id, quantity)
+        elif price is not None:
+            with character_lock(character):
+                if character["gold"] < price * quantity:
+                    raise InsufficientResourcesError("Not enough gold for this order.")
+                character["gold"] -= price * quantity
+
+        order = {
+            "order_id": next(self._ids),
+            "character": character,
+            "side": side,
+            "item_id": item_id,
+            "price": price,
+            "quantity": quantity,
+            "remaining": quantity,
+            "filled": 0,
+            "max_stack": max_stack,
+            "status": "open"
+        }
+
+        book = self._book(item_id)
+        self._match(order, book)
+
+        if order["remaining"] == 0:
+            order["status"] = "filled"
+        elif price is None:
+            self._release(order)
+        else:
+            self.orders[order["order_id"]] = order
+            if side == "buy":
+                heapq.heappush(book["bids"], (-price, order["order_id"], order))
+            else:
+                heapq.heappush(book["asks"], (price, order["order_id"], order))
+
+        return order
+
+    def buy(self, character, item_id, quantity, price=None, max_stack=None):
+        """Place a buy order (a market order if price is None)"""
+        return self.place_order(character, "buy", item_id, quantity, price, max_stack)
+
+    def sell(self, character, item_id, quantity, price=None):
+        """Place a sell order (a market order if price is None)"""
+        return self.place_order(character, "sell", item_id, quantity, price)
+
+    def cancel(self, order_id):
+        """
+        Cancel a resting order and return its escrow to the owner
+
+        Returns: The cancelled order dictionary
+        Raises: ValueError if the order is not open
+        """
+        with self._lock:
+            order = self.orders.pop(order_id, None)
+            if order is None:
+                raise ValueError(f"Order {order_id} is not open")
+
+            self._release(order)
+            return order
+
+    def _release(self, order):
+        """Give back what an order still holds in escrow and close it"""
+        if order["side"] == "sell":
+            self._deliver(order["character"], order["item_id"], order["remaining"], order["max_stack"])
+        elif order["price"] is not None:
+            with character_lock(order["character"]):
+                order["character"]["gold"] += order["price"] * order["remaining"]
+
+        order["status"] = "cancelled"
+
+    def _match(self, order, book):
+        """Fill order against the other side of the book"""
+        buying = order["side"] == "buy"
+        opposite = book["asks"] if buying else book["bids"]
+        limit = order["price"]
+
+        while order["remaining"] and opposite:
+            resting = opposite[0][2]
+            if resting["status"] != "open":
+                heapq.heappop(opposite)
+                continue
+
+            price = resting["price"]
+            if limit is not None and (price > limit if buying else price < limit):
+                break
+
+            quantity = min(order["remaining"], resting["remaining"])
+            buyer, seller = (order, resting) if buying else (resting, order)
+            if not self._settle(buyer, seller, price, quantity):
+                break
+
+            if resting["remaining"] == 0:
+                resting["status"] = "filled"
+                heapq.heappop(opposite)
+                del self.orders[resting["order_id"]]
+
+    def _settle(self, buyer, seller, price, quantity):
+        """
+        Move gold and items for one fill between two orders
+
+        Returns: False if a market buyer can't afford even one unit
+        """
+        with character_lock(buyer["character"]):
+            gold = buyer["character"]["gold"]
+            if buyer["price"] is None:
+                # Market buys pay as they go and stop when the gold runs out
+                quantity = min(quantity, gold // price)
+                if quantity == 0:
+                    return False
+                buyer["character"]["gold"] = gold - price * quantity
+            else:
+                buyer["character"]["gold"] = gold + (buyer["price"] - price) * quantity
+
+        with character_lock(seller["character"]):
+            seller["character"]["gold"] += price * quantity
+
+        self._deliver(buyer["character"], buyer["item_id"], quantity, buyer["max_stack"])
+
+        for order in (buyer, seller):
+            order["remaining"] -= quantity
+            order["filled"] += quantity
+        self.trades += 1
+        return True
+
+    def _deliver(self, character, item_id, quantity, max_stack=None):
+        """Add items to an inventory, or hold them if it's full"""
+        try:
+            add_item_to_inventory(character, item_id, quantity, max_stack)
+        except InventoryFullError:
+            waiting = self._waiting(character)
+            waiting[item_id] = waiting.get(item_id, 0) + quantity
+
+    def _waiting(self, character):
+        """Pending {item_id: quantity} for character, created if missing"""
+        entry = self.pending.setdefault(id(character), {"character": character, "items": {}})
+        return entry["items"]
+
+    def collect(self, character, item_data_dict=None):
+        """
+        Deliver items that were held because the inventory was full
+
+        Returns: Dictionary {item_id: quantity} still waiting
+        """
+        with self._lock:
+            entry = self.pending.pop(id(character), None)
+        waiting = entry["items"] if entry else {}
+        left = {}
+
+        for item_id, quantity in waiting.items():
+            max_stack = None
+            if item_data_dict and item_id in item_data_dict:
+                max_stack = item_data_dict[item_id].get("max_stack", 1)
+            try:
+                add_item_to_inventory(character, item_id, quantity, max_stack)
+            except InventoryFullError:
+                left[item_id] = quantity
+
+        if left:
+            with self._lock:
+                merged = self._waiting(character)
+                for item_id, quantity in left.items():
+                    merged[item_id] = merged.get(item_id, 0) + quantity
+        return left
+
+    def best_bid(self, item_id):
+        """Highest open buy price for item_id, or None"""
+        bids = self._book(item_id)["bids"]
+        while bids and bids[0][2]["status"] != "open":
+            heapq.heappop(bids)
+        return bids[0][2]["price"] if bids else None
+
+    def best_ask(self, item_id):
+        """Lowest open sell price for item_id, or None"""
+        asks = self._book(item_id)["asks"]
+        while asks and asks[0][2]["status"] != "open":
+            heapq.heappop(asks)
+        return asks[0][2]["price"] if asks else None
+
+# ============================================================================
+# TESTING
+# ============================================================================
+
+if __name__ == "__main__":
+    print("=== MARKET SYSTEM BENCHMARK ===")
+
+    import random
+    import time
+
+    rng = random.Random(163)
+    market = Market()
+    traders = [
+        {"name": f"Trader{i}", "gold": 10 ** 9, "inventory": []}
+        for i in range(50)
+    ]
+    for trader in traders:
+        add_item_to_inventory(trader, "health_potion", 10 ** 7, 10 ** 7)
+
+    orders = 100000
+    start = time.perf_counter()
+    for _ in range(orders):
+        trader = rng.choice(traders)
+        side = rng.choice(("buy", "sell"))
+        price = rng.randint(20, 30) if rng.random() < 0.9 else None
+        market.place_order(trader, side, "health_potion", rng.randint(1, 5), price, 10 ** 7)
+    elapsed = time.perf_counter() - start
+
+    print(f"{orders} orders, {market.trades} matches in {elapsed:.2f}s")
+    print(f"{orders / elapsed:,.0f} orders/s, {market.trades / elapsed:,.0f} matches/s")
@@ -14,8 +14,291 @@ from custom_exceptions import (
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
     QuestNotActiveError,
-    InsufficientLevelError
+    InsufficientLevelError,
+    InvalidDataFormatError
 )
+from game_data import parse_prerequisites, parse_objectives
+from character_manager import current_value
+
+from bisect import bisect_left, bisect_right
+
+# ============================================================================
+# QUEST LOGS
+# ============================================================================
+
+class QuestLog:
+    """
+    Ordered set of quest ids, used for active and completed quests
+
+    Replaces the plain lists so membership, adding and removing are O(1)
+    however many quests are held, while iteration keeps the order quests
+    were added. Saves still write it as a comma-separated list.
+    """
+
+    def __init__(self, quest_ids=()):
+        self._ids = dict.fromkeys(quest_ids)
+
+    def append(self, quest_id):
+        """Add quest_id at the end (no effect if already present)"""
+        self._ids[quest_id] = None
+
+    def extend(self, quest_ids):
+        for quest_id in quest_ids:
+            self._ids[quest_id] = None
+
+    def remove(self, quest_id):
+        """Remove quest_id (ValueError if missing, like list.remove)"""
+        if quest_id not in self._ids:
+            raise ValueError(f"{quest_id} not in quest log")
+        del self._ids[quest_id]
+
+    def discard(self, quest_id):
+        self._ids.pop(quest_id, None)
+
+    def clear(self):
+        self._ids.clear()
+
+    def copy(self):
+        return QuestLog(self._ids)
+
+    def __iadd__(self, quest_ids):
+        self.extend(quest_ids)
+        return self
+
+    def __contains__(self, quest_id):
+        return quest_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __eq__(self, other):
+        # Equal to a log or list holding the same ids in the same order
+        if isinstance(other, QuestLog):
+            return list(self._ids) == list(other._ids)
+        if isinstance(other, (list, tuple)):
+            return list(self._ids) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"QuestLog({list(self._ids)!r})"
+
+def get_quest_log(character, key):
+    """
+    Return character[key] ('active_quests' or 'completed_quests') as a QuestLog
+
+    Characters created or loaded by character_manager hold plain lists;
+    they are converted in place the first time quest_handler touches them.
+    """
+    quest_log = character[key]
+
+    # Inside a transaction the field is a snapshot wrapper; keep using it
+    if not isinstance(current_value(quest_log), QuestLog):
+        quest_log = QuestLog(quest_log)
+        character[key] = quest_log
+
+    return quest_log
+
+# ============================================================================
+# QUEST INDEX
+# ============================================================================
+
+def get_quest_index(quest_data_dict):
+    """
+    Get the precomputed quest graph for a quest catalog
+    
+    The index is built once per catalog version and cached on catalogs
+    loaded by game_data (DataCatalog); plain dictionaries get a fresh
+    index on every call.
+    
+    Every quest id (and every prerequisite id) gets its own bit, so a set
+    of quests is one integer and prerequisites are checked with one mask
+    test.
+    
+    Returns: Dictionary with
+        'dependents': {quest_id: [quests that require it]}
+        'levels': sorted list of every quest's required level
+        'level_order': quest ids in the same order as 'levels'
+        'position': {quest_id: position in the catalog}
+        'bits': {quest_id: 1 << n}
+        'requires': {quest_id: ("all" or "any", prerequisite bit mask)}
+        'prerequisites': {quest_id: [prerequisite quest ids]}
+        'chains': {quest_id: memoized chain entry}, filled on demand
+        'objectives': {quest_id: parsed objectives}, for quests that have them
+    """
+    version = getattr(quest_data_dict, "version", None)
+    index = getattr(quest_data_dict, "quest_index", None)
+
+    if index is not None and index["version"] == version:
+        return index
+
+    dependents = {}
+    position = {}
+    bits = {}
+    requires = {}
+    prerequisites = {}
+    objectives = {}
+
+    for qid, quest in quest_data_dict.items():
+        position[qid] = len(position)
+        bits[qid] = 1 << position[qid]
+
+    # Sorted by level (catalog order within a level) for bisect range queries
+    level_order = sorted(
+        quest_data_dict,
+        key=lambda qid: (quest_data_dict[qid]['required_level'], position[qid])
+    )
+    levels = [quest_data_dict[qid]['required_level'] for qid in level_order]
+
+    for qid, quest in quest_data_dict.items():
+        mode, prereq_ids = parse_prerequisites(quest['prerequisite'])
+        prerequisites[qid] = prereq_ids
+
+        mask = 0
+        for prereq in prereq_ids:
+            # Unknown ids still get a bit so a completed list can hold them
+            if prereq not in bits:
+                bits[prereq] = 1 << len(bits)
+            mask |= bits[prereq]
+            dependents.setdefault(prereq, []).append(qid)
+
+        requires[qid] = (mode, mask)
+
+        if quest.get('objectives', "NONE") != "NONE":
+            objectives[qid] = parse_objectives(quest['objectives'])
+
+    index = {
+        "version": version,
+        "dependents": dependents,
+        "levels": levels,
+        "level_order": level_order,
+        "position": position,
+        "bits": bits,
+        "requires": requires,
+        "prerequisites": prerequisites,
+        "chains": {},
+        "objectives": objectives
+    }
+
+    if version is not None:
+        quest_data_dict.quest_index = index
+
+    return index
+
+def _quests_in_level_range(index, min_level=None, max_level=None):
+    """
+    Quest ids with min_level <= required_level <= max_level, in level order
+    
+    Two bisects and one slice: O(log Q + k). Either bound may be None.
+    """
+    levels = index["levels"]
+    low = 0 if min_level is None else bisect_left(levels, min_level)
+    high = len(levels) if max_level is None else bisect_right(levels, max_level)
+    return index["level_order"][low:high]
+
+def _get_completed_bits(character, index):
+    """
+    Get the character's completed quests as a bitset for this index
+    
+    Cached on the character and rebuilt only when the completed list was
+    changed outside quest_handler.
+    """
+    state = character.get('_quest_bits')
+    completed = get_quest_log(character, 'completed_quests')
+
+    if (state is None or state["index"] is not index or state["log"] is not completed
+            or state["count"] != len(completed)):
+        bits = index["bits"]
+        mask = 0
+        for qid in completed:
+            mask |= bits.get(qid, 0)
+        state = {"index": index, "log": completed, "count": len(completed), "mask": mask}
+        character['_quest_bits'] = state
+
+    return state["mask"]
+
+def _prerequisites_met(character, quest_id, index):
+    """Check a quest's prerequisites with a single mask test"""
+    mode, required = index["requires"][quest_id]
+    done = _get_completed_bits(character, index)
+
+    if mode == "any":
+        return done & required != 0
+    return done & required == required
+
+def _get_availability(character, quest_data_dict):
+    """
+    Get the character's cached set of available quest ids
+    
+    The set is rebuilt from scratch only when it was built for another
+    index, the level went down, or the quest lists were changed outside
+    quest_handler. Only quests at or below the character's level are ever
+    tested, and a level up re-checks just the quests for the new levels.
+    """
+    index = get_quest_index(quest_data_dict)
+    state = character.get('_quest_availability')
+    level = character['level']
+    active = get_quest_log(character, 'active_quests')
+    completed = get_quest_log(character, 'completed_quests')
+
+    # A different log object means the list was replaced wholesale
+    if (state is None or state["index"] is not index or level < state["level"]
+            or state["active_log"] is not active or state["completed_log"] is not completed
+            or state["active"] != len(active)
+            or state["completed"] != len(completed)):
+        state = {
+            "index": index,
+            "level": level,
+            "active_log": active,
+            "completed_log": completed,
+            "active": len(active),
+            "completed": len(completed),
+            "available": {
+                qid for qid in _quests_in_level_range(index, max_level=level)
+                if can_accept_quest(character, qid, quest_data_dict, index)
+            }
+        }
+        character['_quest_availability'] = state
+
+    elif level > state["level"]:
+        _recheck_quests(character, quest_data_dict, state,
+                        _quests_in_level_range(index, state["level"] + 1, level))
+        state["level"] = level
+
+    return state
+
+def _recheck_quests(character, quest_data_dict, state, quest_ids):
+    """Re-test a few quests and update the available set"""
+    for qid in quest_ids:
+        if can_accept_quest(character, qid, quest_data_dict, state["index"]):
+            state["available"].add(qid)
+        else:
+            state["available"].discard(qid)
+
+def _update_availability(character, quest_data_dict, quest_ids, active_change, completed_change, index):
+    """
+    Update a character's cached availability after a quest list change
+    
+    If the cached counts don't line up with the change just made, the
+    lists were also edited elsewhere, so the cache is dropped instead.
+    """
+    state = character.get('_quest_availability')
+    if state is None or state["index"] is not index:
+        return
+
+    state["active"] += active_change
+    state["completed"] += completed_change
+
+    if (state["active"] != len(get_quest_log(character, 'active_quests'))
+            or state["completed"] != len(get_quest_log(character, 'completed_quests'))):
+        del character['_quest_availability']
+        return
+
+    _recheck_quests(character, quest_data_dict, state, quest_ids)
 
 # ============================================================================
 # QUEST MANAGEMENT
@@ -29,6 +312,7 @@ def accept_quest(character, quest_id, quest_data_dict):
         raise QuestNotFoundError(f"Quest '{quest_id}' does not exist.")
 
     quest = quest_data_dict[quest_id]
+    index = get_quest_index(quest_data_dict)
 
     # Check level requirement
     if character['level'] < quest['required_level']:
@@ -36,27 +320,28 @@ def accept_quest(character, quest_id, quest_data_dict):
             f"Requires level {quest['required_level']}."
         )
 
-    # Check prerequisite
-    prereq = quest['prerequisite']
-    if prereq != "NONE" and prereq not in character['completed_quests']:
+    # Check prerequisite ("a,b" needs both, "a|b" needs either)
+    if not _prerequisites_met(character, quest_id, index):
         raise QuestRequirementsNotMetError(
-            f"Must complete prerequisite quest: {prereq}"
+            f"Must complete prerequisite quest: {quest['prerequisite']}"
         )
 
     # Check already completed
-    if quest_id in character['completed_quests']:
+    if quest_id in get_quest_log(character, 'completed_quests'):
         raise QuestAlreadyCompletedError(
             f"Quest '{quest_id}' already completed."
         )
 
     # Check already active
-    if quest_id in character['active_quests']:
+    if quest_id in get_quest_log(character, 'active_quests'):
         raise QuestRequirementsNotMetError(
             f"Quest '{quest_id}' already active."
         )
 
     # Accept quest
-    character['active_quests'].append(quest_id)
+    get_quest_log(character, 'active_quests').append(quest_id)
+    _update_availability(character, quest_data_dict, [quest_id], 1, 0, index)
+    _track_quest(character, quest_id, quest_data_dict, index)
     return True
 
 
@@ -66,18 +351,23 @@ def accept_quest(character, quest_id, quest_data_dict):
 def complete_quest(character, quest_id, quest_data_dict):
     """
     Complete an active quest and grant rewards
+    
+    Returns: Dictionary with 'reward_xp', 'reward_gold' and
+             'unlocked_quests' (ids of quests whose level requirement the
+             reward XP just reached, empty if there was no level up)
     """
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest '{quest_id}' does not exist.")
 
-    if quest_id not in character['active_quests']:
+    if quest_id not in get_quest_log(character, 'active_quests'):
         raise QuestNotActiveError(f"Quest '{quest_id}' is not active.")
 
     quest = quest_data_dict[quest_id]
 
     # Remove from active, move to completed
-    character['active_quests'].remove(quest_id)
-    character['completed_quests'].append(quest_id)
+    get_quest_log(character, 'active_quests').remove(quest_id)
+    get_quest_log(character, 'completed_quests').append(quest_id)
+    _untrack_quest(character, quest_id)
 
     # Grant rewards
     reward_xp = quest['reward_xp']
@@ -86,23 +376,47 @@ def complete_quest(character, quest_id, quest_data_dict):
     # Import here to avoid circular import at top
     from character_manager import gain_experience, add_gold
 
+    old_level = character['level']
     gain_experience(character, reward_xp)
     add_gold(character, reward_gold)
 
+    index = get_quest_index(quest_data_dict)
+    state = character.get('_quest_bits')
+    if state is not None and state["index"] is index and state["count"] + 1 == len(get_quest_log(character, 'completed_quests')):
+        state["mask"] |= index["bits"][quest_id]
+        state["count"] += 1
+
+    # Only this quest and the quests that depend on it can change
+    dependents = index["dependents"].get(quest_id, [])
+    _update_availability(character, quest_data_dict, [quest_id] + dependents, -1, 1, index)
+
+    unlocked = []
+    if character['level'] > old_level:
+        unlocked = _quests_in_level_range(index, old_level + 1, character['level'])
+
     return {
         "reward_xp": reward_xp,
-        "reward_gold": reward_gold
+        "reward_gold": reward_gold,
+        "unlocked_quests": unlocked
     }
     pass
 
-def abandon_quest(character, quest_id):
+def abandon_quest(character, quest_id, quest_data_dict=None):
     """
     Remove a quest from active quests without completing it
+    
+    Pass quest_data_dict to update available quests right away; otherwise
+    they are rebuilt the next time they are looked up.
     """
-    if quest_id not in character['active_quests']:
+    if quest_id not in get_quest_log(character, 'active_quests'):
         raise QuestNotActiveError(f"Quest '{quest_id}' is not active.")
 
-    character['active_quests'].remove(quest_id)
+    get_quest_log(character, 'active_quests').remove(quest_id)
+    _untrack_quest(character, quest_id)
+
+    if quest_data_dict is not None:
+        _update_availability(character, quest_data_dict, [quest_id], -1, 0,
+                             get_quest_index(quest_data_dict))
     return True
     pass
 
@@ -117,7 +431,7 @@ def get_active_quests(character, quest_data_dict):
     # Return list of full quest data dictionaries
     return [
         quest_data_dict[qid]
-        for qid in character['active_quests']
+        for qid in get_quest_log(character, 'active_quests')
         if qid in quest_data_dict
     ]
 
@@ -132,7 +446,7 @@ def get_completed_quests(character, quest_data_dict):
     # TODO: Implement completed quest retrieval
     return [
         quest_data_dict[qid]
-        for qid in character['completed_quests']
+        for qid in get_quest_log(character, 'completed_quests')
         if qid in quest_data_dict
     ]
     pass
@@ -143,28 +457,18 @@ def get_available_quests(character, quest_data_dict):
     
     Available = meets level req + prerequisite done + not completed + not active
     
-    Returns: List of quest dictionaries
+    The available set is kept per character and updated incrementally
+    (see _get_availability), so this doesn't rescan every quest.
+    
+    Returns: List of quest dictionaries in catalog order
     """
-    # TODO: Implement available quest search
-    # Filter all quests by requirements
-    available = []
+    state = _get_availability(character, quest_data_dict)
+    position = state["index"]["position"]
 
-    for qid, quest in quest_data_dict.items():
-        if qid in character['completed_quests']:
-            continue
-        if qid in character['active_quests']:
-            continue
-        if character['level'] < quest['required_level']:
-            continue
-
-        prereq = quest['prerequisite']
-        if prereq != "NONE" and prereq not in character['completed_quests']:
-            continue
-
-        available.append(quest)
-
-    return available
-    pass
+    return [
+        quest_data_dict[qid]
+        for qid in sorted(state["available"], key=position.get)
+    ]
 
 # ============================================================================
 # QUEST TRACKING
@@ -177,7 +481,7 @@ def is_quest_completed(character, quest_id):
     Returns: True if completed, False otherwise
     """
     # TODO: Implement completion check
-    return quest_id in character['completed_quests']
+    return quest_id in get_quest_log(character, 'completed_quests')
 
     pass
 
@@ -188,13 +492,16 @@ def is_quest_active(character, quest_id):
     Returns: True if active, False otherwise
     """
     # TODO: Implement active check
-    return quest_id in character['active_quests']
+    return quest_id in get_quest_log(character, 'active_quests')
     pass
 
-def can_accept_quest(character, quest_id, quest_data_dict):
+def can_accept_quest(character, quest_id, quest_data_dict, index=None):
     """
     Check if character meets all requirements to accept quest
     
+    index is the quest index for quest_data_dict, when the caller already
+    has it (plain dictionaries would otherwise build one per call).
+    
     Returns: True if can accept, False otherwise
     Does NOT raise exceptions - just returns boolean
     """
@@ -208,14 +515,16 @@ def can_accept_quest(character, quest_id, quest_data_dict):
     if character['level'] < quest['required_level']:
         return False
 
-    if quest_id in character['completed_quests']:
+    if quest_id in get_quest_log(character, 'completed_quests'):
         return False
 
-    if quest_id in character['active_quests']:
+    if quest_id in get_quest_log(character, 'active_quests'):
         return False
 
-    prereq = quest['prerequisite']
-    if prereq != "NONE" and prereq not in character['completed_quests']:
+    if index is None:
+        index = get_quest_index(quest_data_dict)
+
+    if not _prerequisites_met(character, quest_id, index):
         return False
 
     return True
@@ -229,31 +538,222 @@ def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     Example: If Quest C requires Quest B, which requires Quest A:
              Returns ["quest_a", "quest_b", "quest_c"]
     
-    Raises: QuestNotFoundError if quest doesn't exist
+    With several prerequisites ("a,b" or "a|b") the chain holds every
+    quest that leads to quest_id, each after its own prerequisites.
+    
+    Chains are memoized in the quest index with shared tails: a quest's
+    entry links to the entry of its first prerequisite's chain and adds
+    only the quests that chain lacks, so a quest line of depth d costs
+    O(d) to memoize rather than O(d^2).
+    
+    Raises:
+        QuestNotFoundError if quest doesn't exist
+        InvalidDataFormatError if the prerequisites form a cycle
     """
-    # TODO: Implement prerequisite chain tracing
-    # Follow prerequisite links backwards
-    # Build list in reverse order
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest '{quest_id}' not found.")
 
-    chain = []
-    current = quest_id
+    index = get_quest_index(quest_data_dict)
+    chains = index["chains"]
+
+    # Depth-first over the prerequisites. A quest's chain is the ordered
+    # union of its prerequisites' chains plus itself. Each memo entry is
+    # (quest_id, tail entry, extra ids): the first prerequisite's chain is
+    # shared, extra ids are quests from the other prerequisites' chains
+    # that it doesn't already hold.
+    stack = [(quest_id, False)]
+    visiting = set()
+
+    while stack:
+        current, expanded = stack.pop()
+        if current in chains:
+            continue
+
+        if expanded:
+            prereqs = index["prerequisites"][current]
+            tail = chains[prereqs[0]] if prereqs else None
+            extras = ()
+            if len(prereqs) > 1:
+                held = set(_expand_chain(tail))
+                extras = {}
+                for prereq in prereqs[1:]:
+                    for earlier in _expand_chain(chains[prereq]):
+                        if earlier not in held:
+                            extras[earlier] = None
+                extras = tuple(extras)
+            chains[current] = (current, tail, extras)
+            visiting.discard(current)
+            continue
 
-    while True:
         if current not in quest_data_dict:
             raise QuestNotFoundError(f"Invalid prerequisite: {current}")
+        if current in visiting:
+            raise InvalidDataFormatError(f"Quest prerequisite cycle at '{current}'")
 
-        chain.insert(0, current)
+        visiting.add(current)
+        stack.append((current, True))
+        for prereq in index["prerequisites"][current]:
+            if prereq not in chains:
+                stack.append((prereq, False))
 
-        prereq = quest_data_dict[current]['prerequisite']
-        if prereq == "NONE":
-            break
-
-        current = prereq
+    return _expand_chain(chains[quest_id])
 
+def _expand_chain(entry):
+    """Turn a memoized chain entry back into a list, earliest quest first"""
+    chain = []
+    while entry is not None:
+        quest_id, entry, extras = entry
+        chain.append(quest_id)
+        chain.extend(reversed(extras))
+    chain.reverse()
     return chain
-    pass
+
+# ============================================================================
+# QUEST OBJECTIVES
+# ============================================================================
+
+def _track_quest(character, quest_id, quest_data_dict, index):
+    """
+    Start listening for events that advance an active quest's objectives
+    
+    Tracking lives in three flat character fields so transactions can
+    roll it back: '_quest_listeners' {(event, target): ((quest_id,
+    position), ...)}, '_quest_progress' {quest_id: tuple of counts or
+    frozensets} and '_quest_objectives' {quest_id: (quest_data_dict,
+    objectives)}. Values are replaced, never changed in place. An event
+    only reaches the listeners stored under its (event, target) keys.
+    """
+    objectives = index["objectives"].get(quest_id)
+    if not objectives:
+        return
+
+    progress = character.setdefault('_quest_progress', {})
+    if quest_id in progress:
+        return
+
+    listeners = character.setdefault('_quest_listeners', {})
+    character.setdefault('_quest_objectives', {})[quest_id] = (quest_data_dict, objectives)
+    progress[quest_id] = tuple(
+        frozenset() if objective["distinct"] else 0 for objective in objectives
+    )
+
+    for position, objective in enumerate(objectives):
+        for target in objective["targets"]:
+            key = (objective["event"], target)
+            listeners[key] = listeners.get(key, ()) + ((quest_id, position),)
+
+def _untrack_quest(character, quest_id):
+    """Stop listening for a quest that is no longer active"""
+    progress = character.get('_quest_progress')
+    if not progress or quest_id not in progress:
+        return
+
+    del progress[quest_id]
+    listeners = character['_quest_listeners']
+    _, objectives = character['_quest_objectives'].pop(quest_id)
+
+    for objective in objectives:
+        for target in objective["targets"]:
+            key = (objective["event"], target)
+            remaining = tuple(entry for entry in listeners[key] if entry[0] != quest_id)
+            if remaining:
+                listeners[key] = remaining
+            else:
+                del listeners[key]
+
+def track_active_quests(character, quest_data_dict):
+    """
+    Listen for objectives of every active quest
+    
+    Needed after loading a save: progress isn't saved, so tracked quests
+    start counting again from zero.
+    """
+    index = get_quest_index(quest_data_dict)
+    for quest_id in get_quest_log(character, 'active_quests'):
+        if quest_id in quest_data_dict:
+            _track_quest(character, quest_id, quest_data_dict, index)
+
+def publish_event(character, event, target, amount=1, tags=()):
+    """
+    Report something the character did that quest objectives may count
+    
+    Args:
+        event: 'kill', 'collect' or 'buy'
+        target: Enemy type or item id
+        amount: How many (ignored by distinct objectives)
+        tags: Other names the target also matches, e.g. the item type
+    
+    Quests whose objectives are all met are completed automatically, with
+    their rewards granted by complete_quest.
+    
+    Returns: List of quest ids completed by this event
+    """
+    listeners = character.get('_quest_listeners')
+    if not listeners:
+        return []
+
+    from character_manager import character_lock
+
+    with character_lock(character):
+        touched = {}
+        for key in (target, *tags, "any"):
+            for entry in listeners.get((event, key), ()):
+                touched[entry] = None
+
+        progress = character['_quest_progress']
+        tracked = character['_quest_objectives']
+        finished = []
+
+        for quest_id, position in touched:
+            values = list(progress[quest_id])
+            if tracked[quest_id][1][position]["distinct"]:
+                values[position] = values[position] | {target}
+            else:
+                values[position] += amount
+            progress[quest_id] = tuple(values)
+
+            if quest_id not in finished and _objectives_met(character, quest_id):
+                finished.append(quest_id)
+
+        for quest_id in finished:
+            quest_data_dict = tracked[quest_id][0]
+            if quest_id in get_quest_log(character, 'active_quests'):
+                complete_quest(character, quest_id, quest_data_dict)
+            else:
+                _untrack_quest(character, quest_id)
+
+    return finished
+
+def _objectives_met(character, quest_id):
+    """Check whether every objective of a tracked quest is done"""
+    return all(
+        done >= total
+        for done, total in _objective_counts(character, quest_id)
+    )
+
+def _objective_counts(character, quest_id):
+    """(done, needed) for each objective of a tracked quest"""
+    _, objectives = character['_quest_objectives'][quest_id]
+    return [
+        (len(value) if objective["distinct"] else value, objective["count"])
+        for objective, value in zip(objectives, character['_quest_progress'][quest_id])
+    ]
+
+def get_quest_progress(character, quest_id):
+    """
+    Get progress on a quest's objectives
+    
+    Returns: List of (done, needed) tuples, empty if the quest isn't
+             being tracked
+    """
+    progress = character.get('_quest_progress')
+    if not progress or quest_id not in progress:
+        return []
+
+    return [
+        (min(done, needed), needed)
+        for done, needed in _objective_counts(character, quest_id)
+    ]
 
 # ============================================================================
 # QUEST STATISTICS
@@ -273,7 +773,7 @@ def get_quest_completion_percentage(character, quest_data_dict):
     if total == 0:
         return 0.0
 
-    completed = len(character['completed_quests'])
+    completed = len(get_quest_log(character, 'completed_quests'))
     return (completed / total) * 100
     pass
 
@@ -286,7 +786,7 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
     total_xp = 0
     total_gold = 0
 
-    for qid in character['completed_quests']:
+    for qid in get_quest_log(character, 'completed_quests'):
         if qid in quest_data_dict:
             total_xp += quest_data_dict[qid]['reward_xp']
             total_gold += quest_data_dict[qid]['reward_gold']
@@ -301,16 +801,45 @@ def get_quests_by_level(quest_data_dict, min_level, max_level):
     """
     Get all quests within a level range
     
-    Returns: List of quest dictionaries
+    Uses the sorted level array in the quest index, so only the quests in
+    the range are touched.
+    
+    Returns: List of quest dictionaries, sorted by required level
     """
+    index = get_quest_index(quest_data_dict)
     return [
-        quest
-        for quest in quest_data_dict.values()
-        if min_level <= quest['required_level'] <= max_level
+        quest_data_dict[qid]
+        for qid in _quests_in_level_range(index, min_level, max_level)
     ]
 
     pass
 
+def get_newly_unlocked_quests(quest_data_dict, old_level, new_level):
+    """
+    Get quests whose level requirement was reached by leveling up
+    
+    These are the quests with old_level < required_level <= new_level;
+    prerequisites are not checked.
+    
+    Returns: List of quest dictionaries, sorted by required level
+    """
+    return get_quests_by_level(quest_data_dict, old_level + 1, new_level)
+
+def get_level_up_messages(quest_data_dict, old_level, new_level):
+    """
+    Build "new quests unlocked" notices for a level up
+    
+    Returns: List of strings, one per level that unlocked quests
+    """
+    by_level = {}
+    for quest in get_newly_unlocked_quests(quest_data_dict, old_level, new_level):
+        by_level.setdefault(quest['required_level'], []).append(quest['title'])
+
+    return [
+        f"New quests unlocked at level {level}: {', '.join(titles)}"
+        for level, titles in by_level.items()
+    ]
+
 # ============================================================================
 # DISPLAY FUNCTIONS
 # ============================================================================
@@ -352,8 +881,8 @@ def display_character_quest_progress(character, quest_data_dict):
     - Completion percentage
     - Total rewards earned
     """
-    active = len(character['active_quests'])
-    completed = len(character['completed_quests'])
+    active = len(get_quest_log(character, 'active_quests'))
+    completed = len(get_quest_log(character, 'completed_quests'))
     percent = get_quest_completion_percentage(character, quest_data_dict)
     rewards = get_total_quest_rewards_earned(character, quest_data_dict)
 
@@ -380,11 +909,11 @@ def validate_quest_prerequisites(quest_data_dict):
     Raises: QuestNotFoundError if invalid prerequisite found
     """
     for qid, quest in quest_data_dict.items():
-        prereq = quest['prerequisite']
-        if prereq != "NONE" and prereq not in quest_data_dict:
-            raise QuestNotFoundError(
-                f"Quest '{qid}' has invalid prerequisite '{prereq}'."
-            )
+        for prereq in parse_prerequisites(quest['prerequisite'])[1]:
+            if prereq not in quest_data_dict:
+                raise QuestNotFoundError(
+                    f"Quest '{qid}' has invalid prerequisite '{prereq}'."
+                )
     return True
     pass
 
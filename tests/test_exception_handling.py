@@ -37,6 +37,22 @@ def test_character_dead_exception():
     with pytest.raises(CharacterDeadError):
         character_manager.gain_experience(char, 50)
 
+def test_save_file_locked_exception(tmp_path):
+    """Test that SaveFileLockedError is raised when a save stays locked"""
+    filename = str(tmp_path / "Locked_save.txt")
+    
+    # Readers share the lock
+    with character_manager.save_file_lock(filename):
+        with character_manager.save_file_lock(filename, timeout=0.05):
+            pass
+    
+    with character_manager.save_file_lock(filename, exclusive=True):
+        with pytest.raises(SaveFileLockedError):
+            with character_manager.save_file_lock(filename, timeout=0.05):
+                pass
+    
+    assert character_manager.get_lock_metrics()['timeouts'] >= 1
+
 # ============================================================================
 # INVENTORY EXCEPTION TESTS
 # ============================================================================
@@ -55,6 +71,63 @@ def test_item_not_found_exception():
     with pytest.raises(ItemNotFoundError):
         inventory_system.remove_item_from_inventory(char, "missing_item")
 
+def test_stack_capacity_exceptions():
+    """Test stack-based capacity and quantity checks"""
+    char = {'inventory': [], 'gold': 100}
+    
+    inventory_system.add_item_to_inventory(char, "arrow", quantity=50, max_stack=5)
+    assert inventory_system.get_inventory_space_remaining(char) == inventory_system.MAX_INVENTORY_SIZE - 10
+    
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, "arrow", quantity=51)
+    
+    with pytest.raises(InsufficientResourcesError):
+        inventory_system.remove_item_from_inventory(char, "arrow", quantity=51)
+    
+    assert inventory_system.count_item(char, "arrow") == 50
+
+def test_inventory_capacity_exceptions():
+    """Test per-character capacity limits"""
+    char = {'inventory': ['item'] * 30, 'gold': 100}
+    
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_item_to_inventory(char, 'item')
+    
+    inventory_system.set_inventory_capacity(char, 40)
+    inventory_system.add_item_to_inventory(char, 'item')
+    
+    with pytest.raises(InventoryFullError):
+        inventory_system.set_inventory_capacity(char, 30)
+    with pytest.raises(ValueError):
+        inventory_system.set_inventory_capacity(char, inventory_system.MAX_INVENTORY_CAPACITY + 1)
+
+def test_invalid_quantity_exception():
+    """Test that zero or negative quantities are rejected"""
+    char = {'inventory': ['potion'], 'gold': 100}
+    item_data = {'cost': 50, 'max_stack': 10}
+    
+    for quantity in (0, -5):
+        with pytest.raises(ValueError):
+            inventory_system.add_item_to_inventory(char, 'potion', quantity)
+        with pytest.raises(ValueError):
+            inventory_system.remove_item_from_inventory(char, 'potion', quantity)
+        with pytest.raises(ValueError):
+            inventory_system.purchase_item(char, 'potion', item_data, quantity)
+        with pytest.raises(ValueError):
+            inventory_system.sell_item(char, 'potion', item_data, quantity)
+    
+    with pytest.raises(ValueError):
+        inventory_system.ShopCart().buy('potion', -10)
+    
+    # Lines edited directly are caught at checkout
+    cart = inventory_system.ShopCart()
+    cart.purchases['potion'] = -10
+    with pytest.raises(ValueError):
+        inventory_system.checkout_cart(char, cart, {'potion': item_data})
+    
+    assert char['gold'] == 100
+    assert char['inventory'] == ['potion']
+
 def test_insufficient_resources_exception():
     """Test that InsufficientResourcesError is raised when not enough gold"""
     char = {'inventory': [], 'gold': 10}
@@ -72,6 +145,37 @@ def test_invalid_item_type_exception():
     with pytest.raises(InvalidItemTypeError):
         inventory_system.use_item(char, "weapon1", item_data)
 
+def test_failed_equip_rolls_back():
+    """Test that a failed weapon swap leaves the character unchanged"""
+    char = character_manager.create_character("Test", "Warrior")
+    char['inventory'] = ['steel_sword'] * inventory_system.MAX_INVENTORY_SIZE
+    char['equipped_weapon'] = 'iron_sword'
+    char['weapon_effect'] = 'strength:5'
+    char['strength'] += 5
+    before = dict(char, inventory=list(char['inventory']))
+    
+    with pytest.raises(InventoryFullError):
+        inventory_system.equip_weapon(
+            char, 'steel_sword', {'type': 'weapon', 'effect': 'strength:10'}
+        )
+    
+    assert char == before
+
+def test_equip_wrong_slot_exception():
+    """Test that items can only be equipped into their own slots"""
+    char = {'inventory': ['ruby_ring', 'health_potion'], 'strength': 10,
+            'health': 50, 'max_health': 80}
+    
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.equip_item(
+            char, 'ruby_ring', {'type': 'ring', 'effect': 'strength:2'}, slot='amulet'
+        )
+    
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.equip_item(
+            char, 'health_potion', {'type': 'consumable', 'effect': 'health:20'}
+        )
+
 # ============================================================================
 # QUEST HANDLER EXCEPTION TESTS
 # ============================================================================
@@ -160,6 +264,121 @@ def test_invalid_data_format_exception():
     finally:
         os.remove("test_bad_data.txt")
 
+def test_invalid_item_effect_exception():
+    """Test that malformed multi-effect strings are rejected"""
+    item = {
+        'item_id': 'bad', 'name': 'Bad', 'type': 'weapon',
+        'cost': 10, 'description': 'Bad'
+    }
+    
+    for effect in ("strength:5,magic", "strength:five", ":5"):
+        with pytest.raises(InvalidDataFormatError):
+            game_data.validate_item_data(dict(item, effect=effect))
+    
+    assert game_data.validate_item_data(dict(item, effect="strength:5,magic:-2"))
+
+def test_loot_table_cycle_exception():
+    """Test that nested loot tables referencing each other are rejected"""
+    with open("test_bad_loot.txt", "w") as f:
+        f.write(
+            "TABLE_ID: a\nROLLS: 1\nGUARANTEED: NONE\nDROPS: @b:1\n\n"
+            "TABLE_ID: b\nROLLS: 1\nGUARANTEED: NONE\nDROPS: @a:1\n"
+        )
+    
+    try:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.load_loot_tables("test_bad_loot.txt")
+    finally:
+        os.remove("test_bad_loot.txt")
+
+def test_crafting_exceptions():
+    """Test recipe cycles and crafting without ingredients"""
+    import crafting_system
+    
+    with open("test_bad_recipes.txt", "w") as f:
+        f.write(
+            "RECIPE_ID: a\nYIELD: 1\nINGREDIENTS: b:1\n\n"
+            "RECIPE_ID: b\nYIELD: 1\nINGREDIENTS: a:2\n"
+        )
+    
+    try:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.load_recipes("test_bad_recipes.txt")
+    finally:
+        os.remove("test_bad_recipes.txt")
+    
+    recipes = game_data.load_recipes("data/recipes.txt")
+    char = character_manager.create_character("Test", "Warrior")
+    
+    with pytest.raises(InsufficientResourcesError):
+        crafting_system.craft_item(char, "steel_sword", recipes)
+    with pytest.raises(ItemNotFoundError):
+        crafting_system.craft_item(char, "dragon_egg", recipes)
+    for quantity in (0, -2):
+        with pytest.raises(ValueError):
+            crafting_system.craft_item(char, "steel_sword", recipes, quantity)
+
+def test_market_order_exceptions():
+    """Test that market orders need the items or gold up front"""
+    import market_system
+    
+    market = market_system.Market()
+    char = character_manager.create_character("Test", "Warrior")
+    char['gold'] = 50
+    
+    with pytest.raises(ItemNotFoundError):
+        market.sell(char, "health_potion", 1, 10)
+    with pytest.raises(InsufficientResourcesError):
+        market.buy(char, "health_potion", 3, 20)
+    assert char['gold'] == 50
+    with pytest.raises(ValueError):
+        market.cancel(999)
+
+def test_mixed_prerequisite_exception():
+    """Test that a prerequisite can't mix AND and OR"""
+    quest = {
+        'quest_id': 'q', 'title': 'Q', 'description': 'Q', 'reward_xp': 1,
+        'reward_gold': 1, 'required_level': 1
+    }
+    
+    for prereq in ("a,b|c", "a,,b", "a|"):
+        with pytest.raises(InvalidDataFormatError):
+            game_data.validate_quest_data(dict(quest, prerequisite=prereq))
+    
+    assert game_data.validate_quest_data(dict(quest, prerequisite="a|b|c"))
+
+def test_invalid_objective_exception():
+    """Test that malformed quest objectives are rejected"""
+    quest = {
+        'quest_id': 'q', 'title': 'Q', 'description': 'Q', 'reward_xp': 1,
+        'reward_gold': 1, 'required_level': 1, 'prerequisite': 'NONE'
+    }
+    
+    for objectives in ("kill:goblin", "tame:goblin:1", "kill:goblin:0", "kill:|orc:2", "collect:any:5:unique"):
+        with pytest.raises(InvalidDataFormatError):
+            game_data.validate_quest_data(dict(quest, objectives=objectives))
+    
+    assert game_data.validate_quest_data(dict(quest, objectives="kill:goblin:3,buy:weapon|armor:1"))
+
+def test_quest_prerequisite_cycle_exception():
+    """Test that quest prerequisite cycles are caught at load and lookup"""
+    quest = "QUEST_ID: {0}\nTITLE: T\nDESCRIPTION: D\nREWARD_XP: 1\nREWARD_GOLD: 1\nREQUIRED_LEVEL: 1\nPREREQUISITE: {1}\n\n"
+    with open("test_bad_quests.txt", "w") as f:
+        f.write(quest.format("a", "c") + quest.format("b", "a") + quest.format("c", "b"))
+    
+    try:
+        with pytest.raises(InvalidDataFormatError):
+            game_data.load_quests("test_bad_quests.txt")
+    finally:
+        os.remove("test_bad_quests.txt")
+    
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'b'},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'a'}
+    }
+    with pytest.raises(InvalidDataFormatError):
+        quest_handler.get_quest_prerequisite_chain('a', quests)
+
 # ============================================================================
 # COMBAT EXCEPTION TESTS
 # ============================================================================
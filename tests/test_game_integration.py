@@ -13,6 +13,8 @@ import character_manager
 import inventory_system
 import quest_handler
 import combat_system
+import crafting_system
+import market_system
 import game_data
 
 # ============================================================================
@@ -40,6 +42,86 @@ def test_character_creation_and_saving():
     # Cleanup
     character_manager.delete_character("IntegrationTest")
 
+def test_header_only_character_loading(tmp_path):
+    """Test that header-only loads defer reading inventory and quests"""
+    save_dir = str(tmp_path)
+    char = character_manager.create_character("HeaderTest", "Cleric")
+    char['inventory'] = ["health_potion", "iron_sword"]
+    char['completed_quests'] = ["first_steps"]
+    character_manager.save_character(char, save_dir)
+    
+    header = character_manager.load_character("HeaderTest", save_dir, header_only=True)
+    
+    assert header['name'] == "HeaderTest"
+    assert header['class'] == "Cleric"
+    assert header['level'] == 1
+    assert not header.fully_loaded
+    
+    # First access to a list field loads the rest of the save
+    assert header['inventory'] == ["health_potion", "iron_sword"]
+    assert header.fully_loaded
+    assert header['completed_quests'] == ["first_steps"]
+    
+    headers = list(character_manager.load_character_headers(save_dir))
+    assert [h['name'] for h in headers] == ["HeaderTest"]
+
+def test_bulk_export_and_import(tmp_path):
+    """Test exporting saves to JSONL/CSV and importing them back"""
+    source_dir = str(tmp_path / "source")
+    for name, char_class in (("ExportA", "Warrior"), ("ExportB", "Mage")):
+        char = character_manager.create_character(name, char_class)
+        char['inventory'] = ["health_potion", "health_potion"]
+        if name == "ExportA":
+            char['inventory_capacity'] = 40
+            inventory_system.add_item_to_inventory(char, "iron_sword")
+            inventory_system.equip_weapon(char, "iron_sword", {'type': 'weapon', 'effect': 'strength:5,magic:1'})
+        character_manager.save_character(char, source_dir)
+    
+    for fmt in ("jsonl", "csv"):
+        export_file = str(tmp_path / f"export.{fmt}")
+        target_dir = str(tmp_path / f"target_{fmt}")
+        
+        summary = character_manager.export_characters(export_file, source_dir)
+        assert summary == {"exported": 2, "skipped": []}
+        
+        with open(export_file, "a") as f:
+            f.write('{"name": "Broken"}\n' if fmt == "jsonl" else "Broken,Rogue,x,1,1,1,1,0,0,,,\n")
+        
+        summary = character_manager.import_characters(export_file, target_dir, max_workers=2)
+        assert summary['imported'] == 2
+        assert len(summary['errors']) == 1
+        
+        loaded = character_manager.load_character("ExportB", target_dir)
+        assert loaded['class'] == "Mage"
+        assert loaded['magic'] == 20
+        assert loaded['inventory'] == ["health_potion", "health_potion"]
+        assert loaded['completed_quests'] == []
+        assert 'inventory_capacity' not in loaded
+        loaded = character_manager.load_character("ExportA", target_dir)
+        assert loaded['inventory_capacity'] == 40
+        assert loaded['equipped_weapon'] == "iron_sword"
+        assert loaded['weapon_effect'] == "strength:5,magic:1"
+        assert loaded['strength'] == 15 + 5
+
+def test_import_rejects_unsafe_names(tmp_path):
+    """Test that imported names can't write saves outside the directory"""
+    import json
+    target_dir = tmp_path / "target"
+    import_file = tmp_path / "import.jsonl"
+    
+    rows = []
+    for name in ("../escaped", "sub/dir", "two\nlines", "Safe"):
+        char = character_manager.create_character("x", "Rogue")
+        char['name'] = name
+        rows.append(json.dumps(char))
+    import_file.write_text("\n".join(rows) + "\n")
+    
+    summary = character_manager.import_characters(str(import_file), str(target_dir), max_workers=1)
+    assert summary['imported'] == 1
+    assert [row for row, _ in summary['errors']] == [1, 2, 3]
+    assert not (tmp_path / "escaped_save.txt").exists()
+    assert character_manager.list_saved_characters(str(target_dir)) == ["Safe"]
+
 def test_character_leveling_system():
     """Test that character leveling works correctly"""
     char = character_manager.create_character("LevelTest", "Mage")
@@ -69,6 +151,138 @@ def test_character_gold_management():
     with pytest.raises(ValueError):
         character_manager.add_gold(char, -1000)
 
+def test_save_lock_sidecar_lifecycle(tmp_path):
+    """Test that loads don't create lock files and deletes keep them"""
+    save_dir = str(tmp_path)
+    char = character_manager.create_character("SidecarTest", "Rogue")
+    filename = os.path.join(save_dir, "SidecarTest_save.txt")
+    
+    character_manager.save_character(dict(char, name="ReadOnly"), save_dir)
+    os.remove(os.path.join(save_dir, "ReadOnly_save.txt.lock"))
+    character_manager.load_character("ReadOnly", save_dir)
+    assert not os.path.exists(os.path.join(save_dir, "ReadOnly_save.txt.lock"))
+    
+    character_manager.save_character(char, save_dir)
+    character_manager.delete_character("SidecarTest", save_dir)
+    assert not os.path.exists(filename)
+    assert os.path.exists(filename + ".lock")
+    
+    # Saving again reuses the same sidecar
+    character_manager.save_character(char, save_dir)
+    assert character_manager.load_character("SidecarTest", save_dir)['name'] == "SidecarTest"
+
+def test_failed_save_leaves_no_temp_file(tmp_path):
+    """Test that a save failing part way keeps the old save and no .tmp"""
+    save_dir = str(tmp_path)
+    char = character_manager.create_character("TempTest", "Mage")
+    character_manager.save_character(char, save_dir)
+    
+    with pytest.raises(TypeError):
+        character_manager.save_character(dict(char, inventory=[1, 2]), save_dir)
+    
+    assert sorted(os.listdir(save_dir)) == ["TempTest_save.txt", "TempTest_save.txt.lock"]
+    assert character_manager.load_character("TempTest", save_dir)['inventory'] == []
+
+def test_save_directory_scanner(tmp_path):
+    """Test that the scanner reports and quarantines bad saves"""
+    save_dir = str(tmp_path / "saves")
+    quarantine_dir = str(tmp_path / "quarantine")
+    report_file = str(tmp_path / "report.txt")
+
+    for name in ("Good1", "Good2"):
+        char = character_manager.create_character(name, "Warrior")
+        character_manager.save_character(char, save_dir)
+
+    with open(os.path.join(save_dir, "Broken_save.txt"), "w") as f:
+        f.write("this is not a save file")
+    with open(os.path.join(save_dir, "Garbled_save.txt"), "wb") as f:
+        f.write(b"\xff\xfe\x00\x81")
+
+    summary = character_manager.scan_save_directory(
+        save_dir, report_file, quarantine_dir, max_workers=2
+    )
+
+    assert summary['scanned'] == 4
+    assert sorted(summary['problems']) == [
+        ("Broken", "InvalidSaveDataError"),
+        ("Garbled", "SaveFileCorruptedError"),
+    ]
+    assert summary['quarantined'] == 2
+    assert sorted(character_manager.list_saved_characters(save_dir)) == ["Good1", "Good2"]
+    assert sorted(os.listdir(quarantine_dir)) == ["Broken_save.txt", "Garbled_save.txt"]
+
+    assert summary['skipped'] == []
+
+    with open(report_file) as f:
+        assert len(f.readlines()) == 2
+
+def test_save_directory_scanner_skips_locked_saves(tmp_path, monkeypatch):
+    """Test that saves held by a writer are reported as skipped"""
+    save_dir = str(tmp_path)
+    char = character_manager.create_character("Busy", "Mage")
+    character_manager.save_character(char, save_dir)
+    monkeypatch.setattr(character_manager, "SAVE_LOCK_TIMEOUT", 0.05)
+
+    filename = os.path.join(save_dir, "Busy_save.txt")
+    with character_manager.save_file_lock(filename, exclusive=True):
+        summary = character_manager.scan_save_directory(save_dir, max_workers=1)
+
+    assert summary['scanned'] == 0
+    assert summary['skipped'] == ["Busy"]
+
+def test_character_snapshot_and_rollback():
+    """Test that snapshots share lists until they are mutated"""
+    char = character_manager.create_character("SnapshotTest", "Rogue")
+    char['inventory'].append("health_potion")
+    original_inventory = char['inventory']
+    
+    with pytest.raises(RuntimeError):
+        with character_manager.character_transaction(char):
+            char['gold'] -= 50
+            char['inventory'].append("iron_sword")
+            assert "iron_sword" in char['inventory']
+            assert original_inventory == ["health_potion"]  # Not touched
+            raise RuntimeError("abort")
+    
+    assert char['gold'] == 100
+    assert char['inventory'] is original_inventory
+    
+    # Committed transactions keep their changes as plain lists
+    with character_manager.character_transaction(char):
+        char['active_quests'].append("first_steps")
+    
+    assert char['active_quests'] == ["first_steps"]
+    assert type(char['active_quests']) is list
+
+def test_quest_rollback_restores_caches():
+    """Test that rolling back quest changes leaves no stale quest state"""
+    quests = game_data.load_quests("data/quests.txt")
+    char = character_manager.create_character("RollbackQuest", "Mage")
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ['first_steps']
+    
+    with pytest.raises(RuntimeError):
+        with character_manager.character_transaction(char):
+            assert character_manager.validate_character_data(char)
+            quest_handler.accept_quest(char, 'first_steps', quests)
+            quest_handler.publish_event(char, 'collect', 'health_potion')
+            raise RuntimeError("abort")
+    
+    assert char['active_quests'] == []
+    assert quest_handler.can_accept_quest(char, 'first_steps', quests)
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ['first_steps']
+    assert quest_handler.publish_event(char, 'kill', 'goblin') == []
+    
+    # Objective progress made inside a rolled-back transaction is undone
+    quest_handler.accept_quest(char, 'first_steps', quests)
+    with pytest.raises(RuntimeError):
+        with character_manager.character_transaction(char):
+            quest_handler.publish_event(char, 'kill', 'goblin')
+            assert 'first_steps' in char['completed_quests']
+            raise RuntimeError("abort")
+    
+    assert 'first_steps' in char['active_quests']
+    assert quest_handler.get_quest_progress(char, 'first_steps') == [(0, 1)]
+
 # ============================================================================
 # INVENTORY INTEGRATION TESTS
 # ============================================================================
@@ -89,6 +303,289 @@ def test_inventory_item_management():
     assert "health_potion" not in char['inventory']  # Consumed
     assert char['health'] == 70  # Healed
 
+def test_inventory_container_counts_and_saves():
+    """Test the counted inventory keeps list behaviour and save format"""
+    char = character_manager.create_character("CounterTest", "Rogue")
+    
+    for item in ("health_potion", "iron_sword", "health_potion"):
+        inventory_system.add_item_to_inventory(char, item)
+    
+    assert isinstance(char['inventory'], inventory_system.Inventory)
+    assert inventory_system.count_item(char, "health_potion") == 2
+    assert inventory_system.has_item(char, "iron_sword")
+    assert len(char['inventory']) == 3
+    assert char['inventory'] == ["health_potion", "health_potion", "iron_sword"]
+    
+    inventory_system.remove_item_from_inventory(char, "health_potion")
+    assert inventory_system.count_item(char, "health_potion") == 1
+    
+    character_manager.save_character(char)
+    loaded = character_manager.load_character("CounterTest")
+    assert sorted(loaded['inventory']) == ["health_potion", "iron_sword"]
+    character_manager.delete_character("CounterTest")
+
+def test_stackable_items():
+    """Test that stacks count toward capacity and bulk buys are one call"""
+    items = game_data.load_items("data/items.txt")
+    potion = items['health_potion']
+    char = character_manager.create_character("StackTest", "Cleric")
+    char['gold'] = potion['cost'] * 500
+    
+    inventory_system.purchase_item(char, "health_potion", potion, quantity=500)
+    
+    assert char['gold'] == 0
+    assert inventory_system.count_item(char, "health_potion") == 500
+    # 500 potions at 99 per stack use 6 slots
+    assert inventory_system.get_inventory_space_remaining(char) == inventory_system.MAX_INVENTORY_SIZE - 6
+    
+    gold = inventory_system.sell_item(char, "health_potion", potion, quantity=100)
+    assert gold == (potion['cost'] // 2) * 100
+    assert inventory_system.get_inventory_space_remaining(char) == inventory_system.MAX_INVENTORY_SIZE - 5
+    
+    # Loaded saves only keep ids; stack sizes come back from item data
+    loaded = {'inventory': list(char['inventory'])}
+    inventory_system.apply_stack_limits(loaded, items)
+    assert loaded['inventory'].stack_count == 5
+
+def test_stack_sizes_saved_with_inventory(tmp_path):
+    """Test that loaded stacks keep their size without item data"""
+    save_dir = str(tmp_path)
+    char = character_manager.create_character("StackSave", "Warrior")
+    inventory_system.add_item_to_inventory(char, "health_potion", 150, 20)
+    character_manager.save_character(char, save_dir)
+    
+    loaded = character_manager.load_character("StackSave", save_dir)
+    assert loaded['stack_limits'] == {"health_potion": 20}
+    inventory_system.add_item_to_inventory(loaded, "health_potion")
+    assert loaded['inventory'].stack_count == 8
+    assert 'stack_limits' not in loaded
+    
+    # Header-only loads, exports and imports keep them too
+    lazy = character_manager.load_character("StackSave", save_dir, header_only=True)
+    assert inventory_system.get_inventory_space_remaining(lazy) == 20 - 8
+    
+    for fmt in ("jsonl", "csv"):
+        export_file = str(tmp_path / f"stacks.{fmt}")
+        target_dir = str(tmp_path / f"stacks_{fmt}")
+        character_manager.export_characters(export_file, save_dir)
+        assert character_manager.import_characters(export_file, target_dir, max_workers=1)['imported'] == 1
+        imported = character_manager.load_character("StackSave", target_dir)
+        assert inventory_system.get_inventory(imported).stack_count == 8
+
+def test_large_inventory_sorted_views(tmp_path):
+    """Test per-character capacity and incrementally sorted views"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("BigBag", "Warrior")
+    
+    inventory_system.set_inventory_capacity(char, 2000)
+    for i in range(1500):
+        inventory_system.add_item_to_inventory(char, f"pebble_{i:04d}")
+    assert inventory_system.get_inventory_space_remaining(char) == 500
+    
+    inventory = inventory_system.get_inventory(char)
+    by_name = inventory.sorted_items("name", items)
+    assert by_name[0] == ("pebble_0000", 1)
+    
+    # Views stay sorted as items come and go
+    inventory_system.add_item_to_inventory(char, "steel_sword")
+    inventory_system.add_item_to_inventory(char, "health_potion", 3, 99)
+    inventory_system.remove_item_from_inventory(char, "pebble_0000")
+    assert inventory.sorted_items("name", items)[0] == ("health_potion", 3)
+    by_type = [item_id for item_id, _ in inventory.sorted_items("type", items)]
+    assert by_type[0] == "health_potion" and by_type[-1] == "steel_sword"
+    by_value = [item_id for item_id, _ in inventory.sorted_items("value", items)]
+    assert by_value[-1] == "steel_sword"
+    
+    display = inventory_system.display_inventory(char, items)
+    assert display.splitlines()[1] == "Health Potion (consumable) x3"
+    
+    # Sell everything worth 100 or less (pebbles aren't shop items)
+    char['gold'] = 0
+    assert inventory_system.sell_junk(char, items, 100) == 36
+    assert inventory_system.has_item(char, "steel_sword")
+    assert not inventory_system.has_item(char, "health_potion")
+    
+    # Capacity survives a save and load
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("BigBag", str(tmp_path))
+    assert inventory_system.get_inventory_capacity(loaded) == 2000
+    header = character_manager.load_character("BigBag", str(tmp_path), header_only=True)
+    assert inventory_system.get_inventory_capacity(header) == 2000
+
+def test_sorted_views_after_catalog_change():
+    """Test that views survive a catalog entry being replaced"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("CatalogSwap", "Warrior")
+    for item_id in ("health_potion", "iron_sword", "steel_sword"):
+        inventory_system.add_item_to_inventory(char, item_id)
+    
+    inventory = inventory_system.get_inventory(char)
+    assert [i for i, _ in inventory.sorted_items("value", items)][0] == "health_potion"
+    
+    # Replacing an entry moves its value key; removal must still find it
+    items["health_potion"] = dict(items["health_potion"], cost=10000)
+    inventory_system.remove_item_from_inventory(char, "health_potion")
+    assert [i for i, _ in inventory.sorted_items("value", items)] == ["iron_sword", "steel_sword"]
+
+def test_inventory_render_cache(monkeypatch):
+    """Test that display_inventory only re-renders changed lines"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("RenderTest", "Mage")
+    for item_id in ("health_potion", "iron_sword", "magic_robe"):
+        inventory_system.add_item_to_inventory(char, item_id)
+    
+    formatted = []
+    original = inventory_system._format_inventory_line
+    monkeypatch.setattr(inventory_system, "_format_inventory_line",
+                        lambda *args: formatted.append(args[0]) or original(*args))
+    
+    first = inventory_system.display_inventory(char, items)
+    assert len(formatted) == 3
+    
+    # Nothing changed: cached text, no formatting
+    version = inventory_system.get_inventory(char).version
+    assert inventory_system.display_inventory(char, items) is first
+    assert len(formatted) == 3
+    
+    # One item changed: only its line is formatted again
+    inventory_system.add_item_to_inventory(char, "health_potion")
+    assert inventory_system.get_inventory(char).version > version
+    text = inventory_system.display_inventory(char, items)
+    assert formatted[3:] == ["health_potion"]
+    assert "Health Potion (consumable) x2" in text
+    
+    # Replacing a catalog entry bumps its version and re-renders everything
+    items["iron_sword"] = dict(items["iron_sword"], name="Old Sword")
+    text = inventory_system.display_inventory(char, items)
+    assert len(formatted) == 7
+    assert "Old Sword (weapon) x1" in text
+
+def test_threaded_inventory_and_gold():
+    """Test that parallel shop actions on one character don't lose updates"""
+    import threading
+    import time
+    
+    item = {'cost': 10, 'max_stack': 99}
+    char = character_manager.create_character("ThreadTest", "Rogue")
+    char['gold'] = 100000
+    inventory_system.set_inventory_capacity(char, 5000)
+    character_manager.reset_character_lock_metrics()
+    
+    def shop():
+        for _ in range(200):
+            inventory_system.purchase_item(char, "health_potion", item)
+            inventory_system.sell_item(char, "health_potion", item)
+            inventory_system.add_item_to_inventory(char, "pebble")
+    
+    threads = [threading.Thread(target=shop) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Each round trip costs 10 and refunds 5
+    assert char['gold'] == 100000 - 8 * 200 * 5
+    assert inventory_system.count_item(char, "pebble") == 1600
+    assert not inventory_system.has_item(char, "health_potion")
+    assert character_manager.get_character_lock_metrics()['acquired'] >= 8 * 200 * 3
+    
+    # A thread that has to wait for the lock is counted as contended
+    character_manager.reset_character_lock_metrics()
+    with character_manager.character_lock(char):
+        waiter = threading.Thread(target=character_manager.add_gold, args=(char, 5))
+        waiter.start()
+        time.sleep(0.05)
+        assert char['gold'] == 100000 - 8000
+    waiter.join()
+    metrics = character_manager.get_character_lock_metrics()
+    assert char['gold'] == 100000 - 8000 + 5
+    assert metrics['contended'] == 1 and metrics['wait_seconds'] > 0
+
+def test_display_inventory_while_changing():
+    """Test that displaying an inventory from other threads never breaks"""
+    import threading
+    
+    items = {'potion': {'name': 'Potion', 'type': 'consumable', 'cost': 5}}
+    char = character_manager.create_character("DisplayTest", "Rogue")
+    char['inventory'] = ["potion"] * 3
+    inventory_system.set_inventory_capacity(char, 5000)
+    errors = []
+    done = threading.Event()
+    
+    def churn():
+        try:
+            for i in range(20000):
+                inventory_system.add_item_to_inventory(char, f"x{i}")
+                inventory_system.remove_item_from_inventory(char, f"x{i}")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+    
+    def display(sort_by):
+        try:
+            while not done.is_set():
+                inventory_system.display_inventory(char, items, sort_by)
+                inventory_system.count_item(char, "potion")
+        except Exception as e:
+            errors.append(e)
+    
+    # Switch threads often so a missing lock shows up quickly
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=churn)]
+        threads += [threading.Thread(target=display, args=(view,)) for view in ("name", "value")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    
+    assert errors == []
+    assert inventory_system.display_inventory(char, items, "name") == (
+        "=== INVENTORY ===\nPotion (consumable) x3"
+    )
+
+def test_lock_metrics_while_crafting():
+    """Test that crafting takes the character lock and no acquires are lost"""
+    import threading
+    import time
+    
+    recipes = game_data.load_recipes("data/recipes.txt")
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("CraftLockTest", "Warrior")
+    inventory_system.set_inventory_capacity(char, 5000)
+    inventory_system.add_item_to_inventory(char, "health_potion", 1500, 5000)
+    character_manager.reset_character_lock_metrics()
+    
+    # Reading the metrics from another thread must not drop any acquires
+    done = threading.Event()
+    def poll():
+        while not done.is_set():
+            character_manager.get_character_lock_metrics()
+    poller = threading.Thread(target=poll)
+    poller.start()
+    
+    def craft():
+        for _ in range(100):
+            crafting_system.craft_item(char, "super_health_potion", recipes, 1, items)
+    crafters = [threading.Thread(target=craft) for _ in range(4)]
+    with character_manager.character_lock(char):
+        for thread in crafters:
+            thread.start()
+        time.sleep(0.05)
+        assert inventory_system.count_item(char, "health_potion") == 1500
+    for thread in crafters:
+        thread.join()
+    done.set()
+    poller.join()
+    
+    assert inventory_system.count_item(char, "super_health_potion") == 400
+    assert inventory_system.count_item(char, "health_potion") == 300
+    assert character_manager.get_character_lock_metrics()['acquired'] >= 401
+
 def test_equipment_system():
     """Test equipping weapons and armor"""
     char = character_manager.create_character("EquipTest", "Warrior")
@@ -104,6 +601,104 @@ def test_equipment_system():
     assert 'equipped_weapon' in char
     assert char['equipped_weapon'] == "iron_sword"
 
+def test_equipment_modifiers_do_not_drift():
+    """Test that equipment bonuses are tracked as removable modifiers"""
+    char = character_manager.create_character("ModifierTest", "Warrior")
+    base_strength = char['strength']
+    
+    for item in ("iron_sword", "steel_sword"):
+        inventory_system.add_item_to_inventory(char, item)
+    
+    inventory_system.equip_weapon(char, "iron_sword", {'type': 'weapon', 'effect': 'strength:5'})
+    inventory_system.equip_weapon(char, "steel_sword", {'type': 'weapon', 'effect': 'strength:10'})
+    assert char['strength'] == base_strength + 10
+    assert character_manager.get_base_stats(char)['strength'] == base_strength
+    
+    # Level-ups change the base stat underneath the bonus
+    character_manager.gain_experience(char, 100)
+    assert character_manager.get_base_stats(char)['strength'] == base_strength + 2
+    
+    assert inventory_system.unequip_weapon(char) == "steel_sword"
+    assert char['strength'] == base_strength + 2
+    assert char['stat_modifiers'] == {}
+
+def test_equipment_survives_save_and_load(tmp_path):
+    """Test that equipped items and their bonuses are saved, buffs are not"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("SavedGear", "Warrior")
+    base_strength = char['strength']
+    sword_bonus = game_data.parse_effect_string(items['steel_sword']['effect'])['strength']
+    
+    inventory_system.add_item_to_inventory(char, "steel_sword")
+    inventory_system.add_item_to_inventory(char, "battle_tonic")
+    inventory_system.equip_item(char, "steel_sword", items['steel_sword'])
+    inventory_system.use_item(char, "battle_tonic", items['battle_tonic'])
+    assert char['strength'] > base_strength + sword_bonus
+    
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("SavedGear", str(tmp_path))
+    assert loaded['equipped_weapon'] == "steel_sword"
+    assert loaded['strength'] == base_strength + sword_bonus
+    
+    # Saving the loaded character again doesn't change anything
+    character_manager.save_character(loaded, str(tmp_path))
+    loaded = character_manager.load_character("SavedGear", str(tmp_path))
+    assert loaded['strength'] == base_strength + sword_bonus
+    
+    assert inventory_system.unequip_weapon(loaded) == "steel_sword"
+    assert loaded['strength'] == base_strength
+    assert inventory_system.has_item(loaded, "steel_sword")
+
+def test_multi_slot_equipment():
+    """Test that rings fill both ring slots and all slots share one path"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("SlotTest", "Rogue")
+    base_strength = char['strength']
+    base_magic = char['magic']
+    
+    for item in ("ruby_ring", "ruby_ring", "sage_amulet", "iron_helmet"):
+        inventory_system.add_item_to_inventory(char, item)
+    
+    for item in ("ruby_ring", "ruby_ring", "sage_amulet", "iron_helmet"):
+        inventory_system.equip_item(char, item, items[item])
+    
+    assert inventory_system.get_equipped_items(char) == {
+        "helmet": "iron_helmet", "ring_1": "ruby_ring",
+        "ring_2": "ruby_ring", "amulet": "sage_amulet",
+    }
+    assert char['strength'] == base_strength + 4
+    assert character_manager.get_modifier_totals(char) == {
+        "strength": 4, "magic": 4, "max_health": 5
+    }
+    
+    assert inventory_system.unequip_item(char, "ring_2") == "ruby_ring"
+    assert char['strength'] == base_strength + 2
+    assert inventory_system.unequip_item(char, "ring_2") is None
+    assert char['magic'] == base_magic + 4
+
+def test_multi_effect_items():
+    """Test that items with several effects are compiled and applied"""
+    items = game_data.load_items("data/items.txt")
+    axe = items['berserker_axe']
+    assert axe['effects'] == {"strength": 12, "magic": -3}
+    assert inventory_system.parse_item_effect(axe['effect']) == axe['effects']
+    
+    char = character_manager.create_character("EffectTest", "Warrior")
+    base_strength, base_magic = char['strength'], char['magic']
+    inventory_system.add_item_to_inventory(char, "berserker_axe")
+    
+    message = inventory_system.equip_weapon(char, "berserker_axe", axe)
+    assert "+12 strength, -3 magic" in message
+    assert char['strength'] == base_strength + 12
+    assert char['magic'] == base_magic - 3
+    
+    tonic = {'type': 'consumable', 'effect': 'health:10,strength:1', 'name': 'Tonic'}
+    char['health'] = 50
+    inventory_system.add_item_to_inventory(char, "tonic")
+    inventory_system.use_item(char, "tonic", tonic)
+    assert char['health'] == 60
+    assert char['strength'] == base_strength + 13
+
 def test_shop_system():
     """Test buying and selling items"""
     char = character_manager.create_character("ShopTest", "Mage")
@@ -123,6 +718,77 @@ def test_shop_system():
     assert gold_received == 12  # Half of cost (25 // 2)
     assert "health_potion" not in char['inventory']
 
+def test_shop_cart_checkout():
+    """Test that a bulk order is validated and applied as a whole"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("CartTest", "Warrior")
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+    
+    cart = inventory_system.ShopCart()
+    cart.buy("health_potion", 3).buy("leather_armor").sell("iron_sword")
+    
+    # 100 gold + 50 from the sword covers 3 * 25 + 75
+    result = inventory_system.checkout_cart(char, cart, items)
+    
+    assert result == {"spent": 150, "earned": 50, "gold": 0}
+    assert inventory_system.count_item(char, "health_potion") == 3
+    assert inventory_system.has_item(char, "leather_armor")
+    assert not inventory_system.has_item(char, "iron_sword")
+    
+    # A failing order changes nothing
+    cart = inventory_system.ShopCart().sell("health_potion").buy("steel_sword")
+    from custom_exceptions import InsufficientResourcesError
+    with pytest.raises(InsufficientResourcesError):
+        inventory_system.checkout_cart(char, cart, items)
+    
+    assert inventory_system.count_item(char, "health_potion") == 3
+    assert char['gold'] == 0
+
+def test_dynamic_shop_pricing():
+    """Test that prices follow demand only when the batch timer fires"""
+    items = game_data.load_items("data/items.txt")
+    now = [0.0]
+    pricing = inventory_system.ShopPricing(items, interval=60, clock=lambda: now[0])
+    char = character_manager.create_character("PriceTest", "Warrior")
+    char['gold'] = 10000
+    
+    assert pricing.buy_price("health_potion") == 25
+    assert pricing.sell_price("iron_sword") == 50
+    
+    inventory_system.purchase_item(char, "health_potion", items["health_potion"], 20, pricing)
+    assert char['gold'] == 10000 - 25 * 20
+    assert pricing.buy_price("health_potion") == 25
+    
+    inventory_system.add_item_to_inventory(char, "iron_sword", 10, 10)
+    assert inventory_system.sell_item(char, "iron_sword", items["iron_sword"], 10, pricing) == 500
+    
+    # Next batch: buying raised the potion price, selling cut the sword's
+    now[0] = 60
+    assert pricing.buy_price("health_potion") == 33
+    assert pricing.buy_price("iron_sword") == 75
+    assert pricing.sell_price("iron_sword") == 37
+    
+    # Volume decays, so prices drift back once trading stops
+    now[0] = 120
+    assert 25 < pricing.buy_price("health_potion") < 33
+    
+    shop = inventory_system.display_shop(items, pricing)
+    assert "health_potion" in shop
+    
+    # Carts pay the same current prices and feed the next batch
+    now[0] = 0.0
+    pricing = inventory_system.ShopPricing(items, interval=60, clock=lambda: now[0])
+    char = character_manager.create_character("CartPriceTest", "Warrior")
+    char['gold'] = 10000
+    inventory_system.add_item_to_inventory(char, "iron_sword", 10, 10)
+    cart = inventory_system.ShopCart().buy("health_potion", 20).sell("iron_sword", 10)
+    result = inventory_system.checkout_cart(char, cart, items, pricing)
+    assert result == {"spent": 25 * 20, "earned": 50 * 10, "gold": 10000}
+    
+    now[0] = 60
+    assert pricing.buy_price("health_potion") == 33
+    assert pricing.sell_price("iron_sword") == 37
+
 # ============================================================================
 # QUEST INTEGRATION TESTS
 # ============================================================================
@@ -187,6 +853,237 @@ def test_quest_prerequisite_system():
     quest_handler.accept_quest(char, 'second_quest', quests)
     assert 'second_quest' in char['active_quests']
 
+def test_incremental_quest_availability(monkeypatch):
+    """Test that available quests are updated without rescanning"""
+    quests = game_data.load_quests("data/quests.txt")
+    char = character_manager.create_character("AvailTest", "Warrior")
+    
+    def available():
+        return [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)]
+    
+    assert available() == ["first_steps"]
+    
+    checked = []
+    original = quest_handler.can_accept_quest
+    monkeypatch.setattr(quest_handler, "can_accept_quest",
+                        lambda c, qid, q, index=None: checked.append(qid) or original(c, qid, q, index))
+    
+    # Accepting and completing re-checks only the quest and its dependents
+    quest_handler.accept_quest(char, "first_steps", quests)
+    assert available() == []
+    quest_handler.complete_quest(char, "first_steps", quests)
+    assert set(checked) == {"first_steps", "goblin_hunter", "equipment_upgrade"}
+    assert available() == []
+    
+    # Levelling up re-checks only the quests for the new level
+    checked.clear()
+    character_manager.gain_experience(char, 100)
+    assert available() == ["goblin_hunter", "equipment_upgrade"]
+    assert set(checked) == {"goblin_hunter", "equipment_upgrade"}
+    
+    quest_handler.accept_quest(char, "goblin_hunter", quests)
+    quest_handler.abandon_quest(char, "goblin_hunter", quests)
+    assert available() == ["goblin_hunter", "equipment_upgrade"]
+    
+    # Lists edited directly are noticed and the set is rebuilt
+    char['completed_quests'].append("equipment_upgrade")
+    assert available() == ["goblin_hunter"]
+
+def test_plain_dict_quest_index_built_once(monkeypatch):
+    """Test that plain-dict catalogs build one quest index per call"""
+    quests = {
+        f"q{i}": {
+            'quest_id': f"q{i}", 'title': 'Q', 'description': 'Q', 'reward_xp': 1,
+            'reward_gold': 1, 'required_level': 1,
+            'prerequisite': "NONE" if i == 0 else f"q{i - 1}"
+        }
+        for i in range(50)
+    }
+    char = character_manager.create_character("PlainIndex", "Warrior")
+    
+    builds = []
+    original = quest_handler.get_quest_index
+    monkeypatch.setattr(quest_handler, "get_quest_index",
+                        lambda q: builds.append(1) or original(q))
+    
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)] == ["q0"]
+    assert len(builds) == 1
+    
+    builds.clear()
+    quest_handler.accept_quest(char, "q0", quests)
+    assert len(builds) == 1
+
+def test_memoized_prerequisite_chains():
+    """Test that prerequisite chains are built once and share prefixes"""
+    quests = game_data.load_quests("data/quests.txt")
+    
+    chain = quest_handler.get_quest_prerequisite_chain("dragon_slayer", quests)
+    assert chain == ["first_steps", "goblin_hunter", "orc_menace", "dragon_slayer"]
+    
+    # Every quest on the way was memoized by the same walk, sharing tails
+    chains = quest_handler.get_quest_index(quests)["chains"]
+    assert chains["dragon_slayer"][1] is chains["orc_menace"]
+    assert quest_handler.get_quest_prerequisite_chain("orc_menace", quests) == [
+        "first_steps", "goblin_hunter", "orc_menace"
+    ]
+    
+    # Several prerequisites: every quest leading there, each after its own
+    chain = quest_handler.get_quest_prerequisite_chain("legendary_hero", quests)
+    assert chain[-1] == "legendary_hero"
+    assert set(chain) == set(quests) - {"master_adventurer", "arena_champion"}
+    for quest_id in chain:
+        for earlier in quest_handler.get_quest_prerequisite_chain(quest_id, quests)[:-1]:
+            assert chain.index(earlier) < chain.index(quest_id)
+    
+    # Changing the catalog invalidates the memo
+    quests["orc_menace"] = dict(quests["orc_menace"], prerequisite="NONE")
+    assert quest_handler.get_quest_prerequisite_chain("dragon_slayer", quests) == [
+        "orc_menace", "dragon_slayer"
+    ]
+
+def test_deep_quest_line(tmp_path):
+    """Test that a very deep quest line loads and chains without recursion"""
+    block = "QUEST_ID: q{0}\nTITLE: Q\nDESCRIPTION: Q\nREWARD_XP: 1\nREWARD_GOLD: 1\nREQUIRED_LEVEL: 1\nPREREQUISITE: {1}\n\n"
+    depth = 3000
+    quest_file = tmp_path / "deep_quests.txt"
+    # Written deepest first, so the cycle check walks the whole line at once
+    quest_file.write_text("".join(
+        block.format(i, f"q{i - 1}" if i else "NONE") for i in reversed(range(depth))
+    ))
+    
+    quests = game_data.load_quests(str(quest_file))
+    chain = quest_handler.get_quest_prerequisite_chain(f"q{depth - 1}", quests)
+    assert chain == [f"q{i}" for i in range(depth)]
+
+def test_multi_prerequisite_quests():
+    """Test AND (a,b) and OR (a|b) prerequisites"""
+    quests = game_data.load_quests("data/quests.txt")
+    char = character_manager.create_character("MultiTest", "Cleric")
+    char['level'] = 10
+    
+    index = quest_handler.get_quest_index(quests)
+    assert index['requires']['arena_champion'] == (
+        "any", index['bits']['orc_menace'] | index['bits']['treasure_hunter']
+    )
+    
+    # OR: either prerequisite is enough
+    char['completed_quests'] = ['first_steps', 'equipment_upgrade']
+    assert not quest_handler.can_accept_quest(char, 'arena_champion', quests)
+    char['completed_quests'] += ['treasure_hunter']
+    assert quest_handler.can_accept_quest(char, 'arena_champion', quests)
+    
+    # AND: needs both dragon_slayer and treasure_hunter
+    char['completed_quests'] = ['first_steps', 'goblin_hunter', 'orc_menace', 'dragon_slayer']
+    assert not quest_handler.can_accept_quest(char, 'legendary_hero', quests)
+    
+    char['completed_quests'] += ['equipment_upgrade']
+    quest_handler.accept_quest(char, 'treasure_hunter', quests)
+    quest_handler.complete_quest(char, 'treasure_hunter', quests)
+    assert quest_handler.can_accept_quest(char, 'legendary_hero', quests)
+    assert 'legendary_hero' in [
+        q['quest_id'] for q in quest_handler.get_available_quests(char, quests)
+    ]
+    
+    assert game_data.parse_prerequisites("a|b") == ("any", ["a", "b"])
+    assert game_data.parse_prerequisites("a,b") == ("all", ["a", "b"])
+
+def test_sorted_quest_level_index():
+    """Test level range queries and level-up unlock notices"""
+    quests = game_data.load_quests("data/quests.txt")
+    index = quest_handler.get_quest_index(quests)
+    assert index['levels'] == sorted(index['levels'])
+    
+    in_range = quest_handler.get_quests_by_level(quests, 2, 3)
+    assert [q['quest_id'] for q in in_range] == [
+        'goblin_hunter', 'equipment_upgrade', 'orc_menace', 'treasure_hunter'
+    ]
+    assert quest_handler.get_quests_by_level(quests, 7, 9) == []
+    
+    messages = quest_handler.get_level_up_messages(quests, 2, 6)
+    assert len(messages) == 2
+    assert messages[1].startswith("New quests unlocked at level 6:")
+    
+    # Reward XP that levels the character up reports the unlocked quests
+    char = character_manager.create_character("LevelTest", "Mage")
+    char['experience'] = 90
+    quest_handler.accept_quest(char, 'first_steps', quests)
+    result = quest_handler.complete_quest(char, 'first_steps', quests)
+    assert char['level'] == 2
+    assert result['unlocked_quests'] == ['goblin_hunter', 'equipment_upgrade']
+
+def test_quest_log_ordered_set(tmp_path):
+    """Test quest lists keep their order, skip duplicates, and save as before"""
+    quests = game_data.load_quests("data/quests.txt")
+    char = character_manager.create_character("LogTest", "Rogue")
+    
+    quest_handler.accept_quest(char, 'first_steps', quests)
+    quest_handler.complete_quest(char, 'first_steps', quests)
+    for quest_id in ('goblin_hunter', 'equipment_upgrade'):
+        char['level'] = 2
+        quest_handler.accept_quest(char, quest_id, quests)
+    
+    active = char['active_quests']
+    assert isinstance(active, quest_handler.QuestLog)
+    assert active == ['goblin_hunter', 'equipment_upgrade']
+    assert 'goblin_hunter' in active and 'first_steps' not in active
+    
+    active.append('goblin_hunter')
+    assert len(active) == 2
+    with pytest.raises(ValueError):
+        active.remove('dragon_slayer')
+    
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("LogTest", str(tmp_path))
+    assert loaded['active_quests'] == ['goblin_hunter', 'equipment_upgrade']
+    assert loaded['completed_quests'] == ['first_steps']
+    assert quest_handler.get_quest_log(loaded, 'active_quests') == active
+
+def test_event_driven_quest_objectives():
+    """Test kills, pickups and purchases completing quests automatically"""
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("ObjectiveTest", "Warrior")
+    char['gold'] = 1000
+    
+    # Killing any enemy finishes First Steps and pays its reward
+    quest_handler.accept_quest(char, 'first_steps', quests)
+    battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"))
+    battle.enemy['health'] = 0
+    result = battle.check_battle_end()
+    assert result['completed_quests'] == ['first_steps']
+    assert 'first_steps' in char['completed_quests']
+    assert char['gold'] == 1025
+    
+    # Only goblin kills count toward Goblin Hunter
+    char['level'] = 2
+    quest_handler.accept_quest(char, 'goblin_hunter', quests)
+    assert quest_handler.publish_event(char, 'kill', 'orc') == []
+    quest_handler.publish_event(char, 'kill', 'goblin', 2)
+    assert quest_handler.get_quest_progress(char, 'goblin_hunter') == [(2, 3)]
+    assert quest_handler.publish_event(char, 'kill', 'goblin') == ['goblin_hunter']
+    assert quest_handler.get_quest_progress(char, 'goblin_hunter') == []
+    
+    # Buying a weapon (matched by item type) finishes Better Equipment
+    quest_handler.accept_quest(char, 'equipment_upgrade', quests)
+    inventory_system.purchase_item(char, 'health_potion', items['health_potion'])
+    assert 'equipment_upgrade' in char['active_quests']
+    inventory_system.purchase_item(char, 'iron_sword', items['iron_sword'])
+    assert 'equipment_upgrade' in char['completed_quests']
+    
+    # Treasure Hunter counts different items, not repeats
+    char['level'] = 3
+    quest_handler.accept_quest(char, 'treasure_hunter', quests)
+    combat_system.award_loot(char, {'health_potion': 4}, items)
+    assert quest_handler.get_quest_progress(char, 'treasure_hunter') == [(1, 5)]
+    combat_system.award_loot(char, {item_id: 1 for item_id in list(items)[:5]}, items)
+    assert 'treasure_hunter' in char['completed_quests']
+    
+    # Abandoned quests stop listening
+    char['level'] = 3
+    quest_handler.accept_quest(char, 'orc_menace', quests)
+    quest_handler.abandon_quest(char, 'orc_menace', quests)
+    assert quest_handler.publish_event(char, 'kill', 'orc', 3) == []
+
 # ============================================================================
 # COMBAT INTEGRATION TESTS
 # ============================================================================
@@ -222,6 +1119,197 @@ def test_combat_victory_rewards():
     assert rewards['xp'] == expected_xp
     assert rewards['gold'] == expected_gold
 
+def test_timed_buffs_expire():
+    """Test that timed consumables wear off on schedule"""
+    items = game_data.load_items("data/items.txt")
+    tonic = items['battle_tonic']
+    char = character_manager.create_character("BuffTest", "Warrior")
+    base_strength = char['strength']
+    scheduler = character_manager.EffectScheduler()
+    
+    inventory_system.add_item_to_inventory(char, "battle_tonic", 2)
+    message = inventory_system.use_item(char, "battle_tonic", tonic, scheduler)
+    assert "for 3 turns" in message
+    assert char['strength'] == base_strength + 5
+    
+    scheduler.advance(2)
+    assert char['strength'] == base_strength + 5
+    scheduler.advance()
+    assert char['strength'] == base_strength
+    assert len(scheduler) == 0
+    
+    # Battles tick the scheduler once per round
+    inventory_system.use_item(char, "battle_tonic", dict(tonic, duration=1), scheduler)
+    enemy = combat_system.create_enemy("orc")
+    battle = combat_system.SimpleBattle(char, enemy, scheduler)
+    battle.start_battle()
+    
+    assert battle.turn > 1
+    assert char['strength'] == base_strength
+
+def test_timed_buffs_per_character_and_saves(tmp_path):
+    """Test that buffs tick on their own character's clock and aren't saved"""
+    tonic = game_data.load_items("data/items.txt")['battle_tonic']
+    hero = character_manager.create_character("ClockHero", "Warrior")
+    other = character_manager.create_character("ClockOther", "Warrior")
+    base_strength = hero['strength']
+    
+    for char in (hero, other):
+        inventory_system.add_item_to_inventory(char, "battle_tonic")
+        inventory_system.use_item(char, "battle_tonic", tonic)
+    
+    # Saving writes base stats, so the buff doesn't outlive the session
+    character_manager.save_character(hero, str(tmp_path))
+    loaded = character_manager.load_character("ClockHero", str(tmp_path))
+    assert loaded['strength'] == base_strength
+    assert hero['strength'] == base_strength + 5
+    
+    # The other player's rounds don't use up this player's buff
+    character_manager.get_effect_scheduler(other).advance(5)
+    assert other['strength'] == base_strength
+    assert hero['strength'] == base_strength + 5
+    character_manager.get_effect_scheduler(hero).advance(3)
+    assert hero['strength'] == base_strength
+
+def test_loot_tables_and_alias_sampling():
+    """Test weighted loot rolls and awarding drops"""
+    import random
+    tables = game_data.load_loot_tables("data/loot_tables.txt")
+    rng = random.Random(163)
+    
+    alias = combat_system.AliasTable(["a", "b", "c"], [1, 3, 6])
+    counts = {"a": 0, "b": 0, "c": 0}
+    for _ in range(20000):
+        counts[alias.sample(rng)] += 1
+    assert abs(counts["a"] / 20000 - 0.1) < 0.02
+    assert abs(counts["c"] / 20000 - 0.6) < 0.02
+    
+    # Dragons always drop two super potions plus three gear rolls
+    drops = combat_system.roll_loot("dragon", tables, rng)
+    assert drops["super_health_potion"] == 2
+    assert sum(drops.values()) == 5
+    
+    enemy = combat_system.create_enemy("goblin")
+    rewards = combat_system.get_victory_rewards(enemy, tables, rng)
+    assert 'items' in rewards
+    
+    char = character_manager.create_character("LootTest", "Warrior")
+    items = game_data.load_items("data/items.txt")
+    assert combat_system.award_loot(char, drops, items) == {}
+    assert inventory_system.count_item(char, "super_health_potion") == 2
+
+def test_multi_level_crafting():
+    """Test crafting through intermediate recipes in one batch"""
+    recipes = game_data.load_recipes("data/recipes.txt")
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("CraftTest", "Warrior")
+    
+    order = crafting_system.get_craft_order("berserker_axe", recipes)
+    assert order[0] == "berserker_axe"
+    assert set(order) == {"berserker_axe", "steel_sword", "battle_tonic"}
+    
+    # Axe needs a steel sword (crafted) and 3 tonics (2 batches of 2)
+    for item_id, quantity in [("iron_sword", 1), ("strength_elixir", 3), ("health_potion", 1)]:
+        inventory_system.add_item_to_inventory(char, item_id, quantity, 10)
+    
+    ready, missing = crafting_system.can_craft(char, "berserker_axe", recipes)
+    assert not ready
+    assert missing == {"strength_elixir": 1, "health_potion": 1}
+    
+    inventory_system.add_item_to_inventory(char, "strength_elixir", 1)
+    inventory_system.add_item_to_inventory(char, "health_potion", 1)
+    produced = crafting_system.craft_item(char, "berserker_axe", recipes, 1, items)
+    
+    assert produced == {"berserker_axe": 1, "battle_tonic": 1}
+    assert inventory_system.count_item(char, "strength_elixir") == 0
+    assert not inventory_system.has_item(char, "iron_sword")
+    
+    # Batch crafting uses held potions: 6 potions make 2 super potions
+    inventory_system.add_item_to_inventory(char, "health_potion", 6)
+    crafting_system.craft_item(char, "super_health_potion", recipes, 2, items)
+    assert inventory_system.count_item(char, "super_health_potion") == 2
+
+def test_deep_recipe_chain(tmp_path):
+    """Test that a very deep recipe chain is planned without recursion"""
+    block = "RECIPE_ID: r{0}\nYIELD: 1\nINGREDIENTS: {1}:1\n\n"
+    depth = 1500
+    recipe_file = tmp_path / "deep_recipes.txt"
+    recipe_file.write_text("".join(
+        block.format(i, f"r{i - 1}" if i else "ore") for i in range(depth)
+    ))
+    
+    recipes = game_data.load_recipes(str(recipe_file))
+    char = character_manager.create_character("DeepCraft", "Warrior")
+    assert crafting_system.get_craft_order(f"r{depth - 1}", recipes)[-1] == "r0"
+    assert crafting_system.can_craft(char, f"r{depth - 1}", recipes) == (False, {"ore": 1})
+    
+    inventory_system.add_item_to_inventory(char, "ore")
+    assert crafting_system.craft_item(char, f"r{depth - 1}", recipes) == {f"r{depth - 1}": 1}
+
+def test_market_order_matching():
+    """Test price-time matching, partial fills and escrow refunds"""
+    market = market_system.Market()
+    alice = character_manager.create_character("Alice", "Warrior")
+    bob = character_manager.create_character("Bob", "Mage")
+    cara = character_manager.create_character("Cara", "Rogue")
+    alice['gold'] = bob['gold'] = cara['gold'] = 1000
+    inventory_system.add_item_to_inventory(alice, "health_potion", 5, 99)
+    inventory_system.add_item_to_inventory(bob, "health_potion", 5, 99)
+    
+    # Same price: Alice was first so she fills first
+    market.sell(alice, "health_potion", 3, 20)
+    market.sell(bob, "health_potion", 3, 20)
+    market.sell(bob, "health_potion", 2, 30)
+    assert inventory_system.count_item(bob, "health_potion") == 0
+    assert market.best_ask("health_potion") == 20
+    
+    # Cara bids 25 for 4: pays 20 each, 5 each refunded from escrow
+    order = market.buy(cara, "health_potion", 4, 25, 99)
+    assert order['status'] == "filled"
+    assert cara['gold'] == 1000 - 80
+    assert alice['gold'] == 1060
+    assert bob['gold'] == 1020
+    assert inventory_system.count_item(cara, "health_potion") == 4
+    
+    # Market buy sweeps the rest of the book; the unfilled part is dropped
+    order = market.buy(cara, "health_potion", 5)
+    assert order['status'] == "cancelled"
+    assert order['filled'] == 4 and order['remaining'] == 1
+    assert cara['gold'] == 920 - 2 * 20 - 2 * 30
+    assert inventory_system.count_item(cara, "health_potion") == 8
+    assert market.best_ask("health_potion") is None
+    
+    # Cancelling a resting bid returns its gold
+    gold = cara['gold']
+    order = market.buy(cara, "health_potion", 2, 10)
+    assert cara['gold'] == gold - 20
+    market.cancel(order['order_id'])
+    assert cara['gold'] == gold
+
+def test_market_pending_deliveries_per_character():
+    """Test that held deliveries go to the buyer, not a namesake"""
+    market = market_system.Market()
+    seller = character_manager.create_character("Seller", "Warrior")
+    buyer = character_manager.create_character("Twin", "Mage")
+    namesake = character_manager.create_character("Twin", "Rogue")
+    buyer['gold'] = 1000
+    inventory_system.add_item_to_inventory(seller, "iron_sword", 2)
+    inventory_system.set_inventory_capacity(buyer, 1)
+    inventory_system.add_item_to_inventory(buyer, "pebble")
+    
+    market.sell(seller, "iron_sword", 2, 10)
+    market.buy(buyer, "iron_sword", 2, 10)
+    assert not inventory_system.has_item(buyer, "iron_sword")
+    
+    assert market.collect(namesake) == {}
+    assert not inventory_system.has_item(namesake, "iron_sword")
+    
+    # Still full: the items keep waiting until there is room
+    assert market.collect(buyer) == {"iron_sword": 2}
+    inventory_system.set_inventory_capacity(buyer, 5)
+    assert market.collect(buyer) == {}
+    assert inventory_system.count_item(buyer, "iron_sword") == 2
+
 # ============================================================================
 # DATA LOADING INTEGRATION TESTS
 # ============================================================================